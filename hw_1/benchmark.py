@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import datetime
+import tempfile
+import statistics
+import subprocess
+import click
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACTS_DIR = os.path.join(SCRIPT_DIR, "artifacts")
+DEFAULT_REPORT_PATH = os.path.join(ARTIFACTS_DIR, "benchmark.json")
+RANDOM_SEED = 0
+CORPUS_WRITE_CHUNK_LINES = 10000
+MAX_WORD_LEN = 12
+TAIL_BENCHMARK_LINES = 10
+CORPUS_ALPHABETS: Dict[str, str] = {
+    "ascii": "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
+    "utf-8": "абвгдеёжзийклмнопрстуфхцчшщъыьэюяabcdefghijklmnopqrstuvwxyz",
+    "cp1251": "абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
+}
+
+
+@dataclass
+class CorpusSpec:
+    size_mb: int
+    line_length: int
+    encoding: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.size_mb}mb_{self.line_length}cols_{self.encoding}"
+
+
+@dataclass
+class BenchmarkResult:
+    tool: str
+    implementation: str
+    corpus: str
+    corpus_bytes: int
+    runs: int
+    seconds: List[float]
+    median_seconds: float
+    mb_per_second: float
+    # None when GNU time is not available
+    peak_rss_kb: Optional[int]
+
+
+def generate_corpus(spec: CorpusSpec, output_path: Path) -> int:
+    rng = random.Random(RANDOM_SEED)
+    alphabet = CORPUS_ALPHABETS[spec.encoding]
+    target_size = spec.size_mb * 1024 * 1024
+    written_size = 0
+    with open(output_path, "wb") as f:
+        while written_size < target_size:
+            lines: List[str] = []
+            for _ in range(CORPUS_WRITE_CHUNK_LINES):
+                line_len = rng.randint(0, 2 * spec.line_length)
+                words: List[str] = []
+                words_len = 0
+                while words_len < line_len:
+                    word = "".join(
+                        rng.choices(alphabet, k=rng.randint(1, MAX_WORD_LEN))
+                    )
+                    words.append(word)
+                    words_len += len(word) + 1
+                lines.append(" ".join(words))
+            chunk = ("\n".join(lines) + "\n").encode(spec.encoding)
+            chunk = chunk[: target_size - written_size]
+            f.write(chunk)
+            written_size += len(chunk)
+    return written_size
+
+
+def get_tool_commands(corpus_path: Path) -> Dict[str, Dict[str, List[str]]]:
+    python = sys.executable
+    corpus = str(corpus_path)
+    return {
+        "nl": {
+            "python": [python, os.path.join(SCRIPT_DIR, "task1.py"), corpus],
+            "coreutils": ["nl", "-b", "a", corpus],
+        },
+        "tail": {
+            "python": [
+                python,
+                os.path.join(SCRIPT_DIR, "task2.py"),
+                "-n",
+                str(TAIL_BENCHMARK_LINES),
+                corpus,
+            ],
+            "coreutils": ["tail", "-n", str(TAIL_BENCHMARK_LINES), corpus],
+        },
+        "wc": {
+            "python": [python, os.path.join(SCRIPT_DIR, "task3.py"), corpus],
+            "coreutils": ["wc", corpus],
+        },
+    }
+
+
+def find_gnu_time() -> Optional[str]:
+    # BSD time of macOS has neither -f nor -o, and has no --version either
+    time_path = shutil.which("time")
+    if time_path is None:
+        return None
+    try:
+        completed = subprocess.run(
+            [time_path, "--version"], capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    if completed.returncode != 0 or "GNU" not in completed.stdout + completed.stderr:
+        return None
+    return time_path
+
+
+def time_command(
+    command: List[str], gnu_time_path: Optional[str] = None
+) -> Tuple[float, Optional[int]]:
+    """Returns elapsed seconds and peak RSS in KB, None when it can not be measured.
+
+    ru_maxrss of a child started from this process also counts the memory
+    of this python process before exec, and polling /proc misses the peak
+    of short runs, so peak RSS is taken from GNU time only. It forks the
+    command from its own small process and reports its exact ru_maxrss.
+    """
+    with tempfile.NamedTemporaryFile("r", suffix=".rss") as rss_file:
+        if gnu_time_path is not None:
+            command = [gnu_time_path, "-f", "%M", "-o", rss_file.name, *command]
+        start = time.perf_counter()
+        completed = subprocess.run(command, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            raise RuntimeError(
+                f"{' '.join(command)} exited with {completed.returncode}"
+            )
+        rss_lines = rss_file.read().split()
+    return elapsed, int(rss_lines[-1]) if rss_lines else None
+
+
+def run_benchmark(
+    corpus_specs: List[CorpusSpec], tools: List[str], runs: int, work_dir: Path
+) -> List[BenchmarkResult]:
+    results: List[BenchmarkResult] = []
+    gnu_time_path = find_gnu_time()
+    if gnu_time_path is None:
+        print("GNU time is not found, peak RSS is not measured", file=sys.stderr)
+    for spec in corpus_specs:
+        corpus_path = work_dir / f"{spec.name}.txt"
+        corpus_bytes = generate_corpus(spec, corpus_path)
+        try:
+            tool_commands = get_tool_commands(corpus_path)
+            for tool in tools:
+                for implementation, command in tool_commands[tool].items():
+                    if shutil.which(command[0]) is None:
+                        print(f"{command[0]} is not found, skipping", file=sys.stderr)
+                        continue
+                    measurements = [
+                        time_command(command, gnu_time_path) for _ in range(runs)
+                    ]
+                    seconds = [elapsed for elapsed, _ in measurements]
+                    median_seconds = statistics.median(seconds)
+                    peak_rss_values = [
+                        peak_rss for _, peak_rss in measurements if peak_rss is not None
+                    ]
+                    results.append(
+                        BenchmarkResult(
+                            tool=tool,
+                            implementation=implementation,
+                            corpus=spec.name,
+                            corpus_bytes=corpus_bytes,
+                            runs=runs,
+                            seconds=seconds,
+                            median_seconds=median_seconds,
+                            mb_per_second=corpus_bytes / 2**20 / median_seconds,
+                            peak_rss_kb=(
+                                max(peak_rss_values) if peak_rss_values else None
+                            ),
+                        )
+                    )
+                    peak_rss_kb = results[-1].peak_rss_kb
+                    print(
+                        f"{tool:5s} {implementation:10s} {spec.name:25s} "
+                        f"{results[-1].mb_per_second:9.1f} MB/s "
+                        + (
+                            f"{peak_rss_kb:8d} KB"
+                            if peak_rss_kb is not None
+                            else "     n/a KB"
+                        )
+                    )
+        finally:
+            corpus_path.unlink()
+    return results
+
+
+def find_regressions(
+    results: List[BenchmarkResult], baseline_path: Path, max_slowdown: float
+) -> List[str]:
+    with open(baseline_path) as f:
+        baseline_report = json.load(f)
+    baseline_speed = {
+        (result["tool"], result["implementation"], result["corpus"]): result[
+            "mb_per_second"
+        ]
+        for result in baseline_report["results"]
+    }
+    regressions: List[str] = []
+    for result in results:
+        key = (result.tool, result.implementation, result.corpus)
+        if key not in baseline_speed:
+            continue
+        slowdown = baseline_speed[key] / result.mb_per_second
+        if slowdown > max_slowdown:
+            regressions.append(
+                f"{'/'.join(key)}: {result.mb_per_second:.1f} MB/s, "
+                f"baseline {baseline_speed[key]:.1f} MB/s ({slowdown:.2f}x slower)"
+            )
+    return regressions
+
+
+def write_report(results: List[BenchmarkResult], report_path: Path) -> None:
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [asdict(result) for result in results],
+    }
+    os.makedirs(report_path.parent, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+@click.command()
+@click.option("--size_mb", type=int, multiple=True, default=[16, 128])
+@click.option("--line_length", type=int, multiple=True, default=[80])
+@click.option(
+    "--encoding",
+    type=click.Choice(list(CORPUS_ALPHABETS)),
+    multiple=True,
+    default=["ascii"],
+)
+@click.option(
+    "--tool", type=click.Choice(["nl", "tail", "wc"]), multiple=True, default=None
+)
+@click.option("--runs", type=click.IntRange(min=1), default=3)
+@click.option("--work_dir", type=Path, default=None)
+@click.option("--output", type=Path, default=Path(DEFAULT_REPORT_PATH))
+@click.option("--baseline", type=Path, default=None)
+@click.option("--max_slowdown", type=float, default=1.2)
+def run(
+    size_mb: Tuple[int, ...],
+    line_length: Tuple[int, ...],
+    encoding: Tuple[str, ...],
+    tool: Tuple[str, ...],
+    runs: int,
+    work_dir: Optional[Path],
+    output: Path,
+    baseline: Optional[Path],
+    max_slowdown: float,
+):
+    corpus_specs = [
+        CorpusSpec(size_mb=size, line_length=length, encoding=corpus_encoding)
+        for size in size_mb
+        for length in line_length
+        for corpus_encoding in encoding
+    ]
+    tools = list(tool) or ["nl", "tail", "wc"]
+    work_dir = work_dir or Path(ARTIFACTS_DIR)
+    os.makedirs(work_dir, exist_ok=True)
+    results = run_benchmark(corpus_specs, tools, runs, work_dir)
+    write_report(results, output)
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, max_slowdown)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,62 @@
+import os
+import mmap
+import zlib
+from pydantic import FilePath
+from typing import BinaryIO, Iterator, Optional
+
+READ_BLOCK_SIZE = 1024 * 1024
+TAIL_CHECKSUM_SIZE = 4096
+
+
+def iter_stream_blocks(
+    stream: BinaryIO, block_size: int = READ_BLOCK_SIZE
+) -> Iterator[bytes]:
+    # read1 returns available data right away, so interactive input is not
+    # delayed until a whole block is collected
+    read = getattr(stream, "read1", stream.read)
+    while block := read(block_size):
+        yield block
+
+
+def iter_file_blocks(
+    file_path: FilePath,
+    start: int = 0,
+    end: Optional[int] = None,
+    block_size: int = READ_BLOCK_SIZE,
+) -> Iterator[bytes]:
+    with open(file_path, "rb") as f:
+        try:
+            file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # empty or non mappable file (pipe, device), plain reads are used
+            if f.seekable():
+                f.seek(start, os.SEEK_SET)
+            while end is None or start < end:
+                read_size = block_size if end is None else min(block_size, end - start)
+                block = f.read(read_size)
+                if not block:
+                    break
+                start += len(block)
+                yield block
+            return
+        with file_map:
+            end = len(file_map) if end is None else min(end, len(file_map))
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                file_map.madvise(mmap.MADV_SEQUENTIAL)
+            for block_start in range(start, end, block_size):
+                yield file_map[block_start : min(block_start + block_size, end)]
+
+
+def iter_input_blocks(
+    file_path: Optional[FilePath], stream: BinaryIO, block_size: int = READ_BLOCK_SIZE
+) -> Iterator[bytes]:
+    if file_path is None:
+        return iter_stream_blocks(stream, block_size)
+    return iter_file_blocks(file_path, block_size=block_size)
+
+
+def compute_tail_checksum(file_path: FilePath, offset: int) -> int:
+    # guards against a file rewritten in place, where inode and size still match
+    with open(file_path, "rb") as f:
+        f.seek(max(offset - TAIL_CHECKSUM_SIZE, 0))
+        return zlib.crc32(f.read(min(offset, TAIL_CHECKSUM_SIZE)))
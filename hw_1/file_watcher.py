@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+from typing import Dict, Iterable, Optional, Set
+
+POLLING_INTERVAL_SECONDS = 1.0
+INOTIFY_READ_SIZE = 64 * 1024
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+DIRECTORY_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+
+
+class PollingWatcher:
+    """Fallback watcher: wakes up periodically and reports that anything could change"""
+
+    def __init__(self, poll_interval: float = POLLING_INTERVAL_SECONDS) -> None:
+        self._poll_interval = poll_interval
+
+    def wait_for_changes(self) -> Optional[Set[str]]:
+        time.sleep(self._poll_interval)
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Watches parent directories of the files, so one watch serves every file in
+    a directory and rename-based rotation (create / move) is reported too"""
+
+    def __init__(
+        self, file_paths: Iterable[str], timeout: float = POLLING_INTERVAL_SECONDS
+    ) -> None:
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc is not available")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not supported on this platform")
+        self._libc = libc
+        self._fd: int = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._timeout_ms = int(timeout * 1000)
+        self._poller = select.poll()
+        self._poller.register(self._fd, select.POLLIN)
+        self._watched_dirs: Dict[int, str] = {}
+        try:
+            for directory in {os.path.dirname(path) for path in file_paths}:
+                self._add_directory_watch(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_directory_watch(self, directory: str) -> None:
+        watch_descriptor = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), DIRECTORY_WATCH_MASK
+        )
+        if watch_descriptor < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"{directory}: {os.strerror(errno)}")
+        self._watched_dirs[watch_descriptor] = directory
+
+    def wait_for_changes(self) -> Optional[Set[str]]:
+        changed_paths: Set[str] = set()
+        if not self._poller.poll(self._timeout_ms):
+            return changed_paths
+        try:
+            events_data = os.read(self._fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return changed_paths
+        offset = 0
+        while offset < len(events_data):
+            watch_descriptor, mask, _, name_len = INOTIFY_EVENT_HEADER.unpack_from(
+                events_data, offset
+            )
+            offset += INOTIFY_EVENT_HEADER.size
+            name = events_data[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped, everything has to be rechecked
+                return None
+            directory = self._watched_dirs.get(watch_descriptor)
+            if directory is not None and name:
+                changed_paths.add(os.path.join(directory, os.fsdecode(name)))
+        return changed_paths
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_file_watcher(file_paths: Iterable[str]):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(file_paths)
+        except OSError:
+            pass
+    return PollingWatcher()
@@ -0,0 +1,183 @@
+import os
+import mmap
+import struct
+import operator
+from array import array
+from itertools import accumulate, islice
+from pydantic import FilePath
+from typing import Optional, Tuple
+from block_reader import compute_tail_checksum, iter_file_blocks
+
+LINE_INDEX_SUFFIX = ".lidx"
+LINE_INDEX_MAGIC = b"LIDX"
+LINE_INDEX_VERSION = 1
+# magic, version, device, inode, indexed size, newlines number,
+# checksum of the last indexed bytes
+LINE_INDEX_HEADER = struct.Struct("<4sIQQQQI")
+OFFSET_TYPECODE = "Q"
+NEWLINE = b"\n"
+
+
+def get_default_index_path(file_path: FilePath) -> str:
+    return f"{file_path}{LINE_INDEX_SUFFIX}"
+
+
+def find_newline_offsets(block: bytes, block_start: int) -> array:
+    block_lines = block.split(NEWLINE)
+    block_lines.pop()
+    # newline offsets are running sums of (line length + 1), computed by
+    # builtins only, so no python code runs per line
+    running_sums = accumulate(
+        map((1).__add__, map(len, block_lines)), initial=block_start - 1
+    )
+    return array(OFFSET_TYPECODE, islice(running_sums, 1, None))
+
+
+class LineIndex:
+    """Offsets of every newline of a file, stored in a sidecar file as a packed
+    uint64 array, so any line is found with a single lookup"""
+
+    def __init__(self, file_path: FilePath, index_path: Optional[str] = None) -> None:
+        self._file_path = file_path
+        self._index_path = index_path or get_default_index_path(file_path)
+        self._index_file = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._offsets: Optional[memoryview] = None
+        self.file_size = 0
+        self.newlines_number = 0
+
+    def __enter__(self) -> "LineIndex":
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _read_header(self) -> Optional[Tuple[int, int, int, int, int]]:
+        try:
+            with open(self._index_path, "rb") as f:
+                header_data = f.read(LINE_INDEX_HEADER.size)
+        except OSError:
+            return None
+        if len(header_data) != LINE_INDEX_HEADER.size:
+            return None
+        magic, version, *header = LINE_INDEX_HEADER.unpack(header_data)
+        if magic != LINE_INDEX_MAGIC or version != LINE_INDEX_VERSION:
+            return None
+        return tuple(header)
+
+    def _write_index(
+        self, file_stat: os.stat_result, indexed_size: int, newlines_number: int
+    ) -> None:
+        with open(self._index_path, "r+b" if indexed_size else "wb") as f:
+            if indexed_size == 0:
+                f.write(bytes(LINE_INDEX_HEADER.size))
+            # offsets are appended in a streaming pass, memory stays constant
+            f.seek(LINE_INDEX_HEADER.size + newlines_number * 8)
+            block_start = indexed_size
+            for block in iter_file_blocks(
+                self._file_path, start=indexed_size, end=file_stat.st_size
+            ):
+                block_offsets = find_newline_offsets(block, block_start)
+                f.write(block_offsets.tobytes())
+                block_start += len(block)
+                newlines_number += len(block_offsets)
+            f.truncate()
+            f.seek(0)
+            f.write(
+                LINE_INDEX_HEADER.pack(
+                    LINE_INDEX_MAGIC,
+                    LINE_INDEX_VERSION,
+                    file_stat.st_dev,
+                    file_stat.st_ino,
+                    file_stat.st_size,
+                    newlines_number,
+                    compute_tail_checksum(self._file_path, file_stat.st_size),
+                )
+            )
+
+    def build(self) -> None:
+        """Builds the index or extends it when the file was only appended"""
+        file_stat = os.stat(self._file_path)
+        header = self._read_header()
+        indexed_size, newlines_number = 0, 0
+        if header is not None:
+            device, inode, header_size, header_newlines, checksum = header
+            is_same_content = (
+                (device, inode) == (file_stat.st_dev, file_stat.st_ino)
+                and header_size <= file_stat.st_size
+                and compute_tail_checksum(self._file_path, header_size) == checksum
+            )
+            if is_same_content and header_size == file_stat.st_size:
+                return
+            # grown file is treated as appended, anything else is reindexed
+            if is_same_content:
+                indexed_size, newlines_number = header_size, header_newlines
+        self._write_index(file_stat, indexed_size, newlines_number)
+
+    def open(self) -> None:
+        self.build()
+        _, _, self.file_size, self.newlines_number, _ = self._read_header()
+        self._index_file = open(self._index_path, "rb")
+        if self.newlines_number:
+            self._index_map = mmap.mmap(
+                self._index_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            self._offsets = memoryview(self._index_map)[LINE_INDEX_HEADER.size :].cast(
+                OFFSET_TYPECODE
+            )
+
+    def close(self) -> None:
+        if self._offsets is not None:
+            self._offsets.release()
+            self._offsets = None
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    @property
+    def lines_number(self) -> int:
+        last_newline_end = (
+            self._offsets[self.newlines_number - 1] + 1 if self.newlines_number else 0
+        )
+        # unterminated last line is a line too
+        return self.newlines_number + int(self.file_size > last_newline_end)
+
+    def get_line_start(self, line_number: int) -> int:
+        if line_number <= 1:
+            return 0
+        if line_number - 1 > self.newlines_number:
+            return self.file_size
+        return self._offsets[line_number - 2] + 1
+
+    def get_line_end(self, line_number: int) -> int:
+        if line_number < 1:
+            return 0
+        if line_number > self.newlines_number:
+            return self.file_size
+        return self._offsets[line_number - 1] + 1
+
+    def get_lines_range(self, first_line: int, last_line: int) -> Tuple[int, int]:
+        """Byte range of lines first_line..last_line, lines are numbered from 1"""
+        return self.get_line_start(first_line), self.get_line_end(last_line)
+
+    def count_empty_lines(self, last_line: int) -> int:
+        """Number of empty lines among lines 1..last_line"""
+        # an empty line is a newline right after the previous one, so an
+        # unterminated last line is never empty
+        newlines_number = min(last_line, self.newlines_number)
+        if newlines_number <= 0:
+            return 0
+        offsets = self._offsets[:newlines_number]
+        return int(offsets[0] == 0) + sum(
+            map((1).__eq__, map(operator.sub, offsets[1:], offsets))
+        )
+
+    def get_tail_range(self, tail_len: int) -> Tuple[int, int]:
+        if tail_len <= 0:
+            return self.file_size, self.file_size
+        first_line = max(self.lines_number - tail_len + 1, 1)
+        return self.get_line_start(first_line), self.file_size
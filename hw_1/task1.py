@@ -1,48 +1,297 @@
 import sys
 import os
+import operator
+import click
+import dataclasses
+from dataclasses import dataclass
 from pydantic import FilePath
-from typing import Optional, List
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+from block_reader import iter_file_blocks, iter_stream_blocks
+from line_index import LineIndex, find_newline_offsets
 
+NL_FLUSH_SIZE = 4 * 1024 * 1024
+NEWLINE = b"\n"
+NUMBER_ALL_LINES = "a"
+NUMBER_NON_EMPTY_LINES = "t"
+NUMBER_NO_LINES = "n"
 
-def extract_user_input_from_arguments() -> Optional[str]:
-    user_arguments = sys.argv[1:]
-    if len(user_arguments) > 1:
-        raise ValueError("Invalid usage, 1 or 0 arguments should be provided")
-    if len(user_arguments) == 1:
-        return user_arguments[0]
-    return None
 
+@dataclass
+class NLOptions:
+    starting_line_number: int = 1
+    line_increment: int = 1
+    number_width: int = 6
+    number_separator: str = "\t"
+    body_numbering: str = NUMBER_ALL_LINES
 
-def run_on_file_path(file_path: FilePath) -> None:
-    with open(file_path, "r") as f:
-        data: List[str] = f.readlines()
-    for line_index, line in enumerate(data, start=1):
-        print(f"\t{line_index} {line}")
 
+class LineNumberer:
+    """Formats numbered lines into a reusable buffer, lines may span several blocks"""
 
-def run_on_lines_from_user() -> None:
-    line_index = 1
-    while True:
-        line = input()
-        print(f"\t{line_index} {line}")
-        line_index += 1
+    def __init__(self, output: BinaryIO, options: NLOptions) -> None:
+        self._output = output
+        self._options = options
+        self._separator = options.number_separator.encode()
+        self._unnumbered_prefix = b" " * (options.number_width + len(self._separator))
+        self._line_format = (
+            b"%"
+            + str(options.number_width).encode()
+            + b"d"
+            + self._separator.replace(b"%", b"%%")
+            + b"%s\n"
+        )
+        self._line_number = options.starting_line_number
+        self._inside_line = False
+        self._output_buffer = bytearray()
 
+    def _should_number(self, line: bytes) -> bool:
+        if self._options.body_numbering == NUMBER_ALL_LINES:
+            return True
+        if self._options.body_numbering == NUMBER_NON_EMPTY_LINES:
+            return bool(line)
+        return False
 
-def main() -> None:
+    def _start_line(self, line: bytes) -> None:
+        if self._should_number(line):
+            self._output_buffer += b"%*d%s" % (
+                self._options.number_width,
+                self._line_number,
+                self._separator,
+            )
+            self._line_number += self._options.line_increment
+        else:
+            self._output_buffer += self._unnumbered_prefix
+
+    def _number_all_complete_lines(self, lines: List[bytes]) -> None:
+        # a single %-format call for the whole block is much cheaper than
+        # formatting every line separately
+        format_arguments: List[object] = [None] * (2 * len(lines))
+        increment = self._options.line_increment
+        last_line_number = self._line_number + len(lines) * increment
+        if increment == 0:
+            format_arguments[0::2] = [self._line_number] * len(lines)
+        else:
+            format_arguments[0::2] = range(
+                self._line_number, last_line_number, increment
+            )
+        format_arguments[1::2] = lines
+        self._output_buffer += (self._line_format * len(lines)) % tuple(
+            format_arguments
+        )
+        self._line_number = last_line_number
+
+    def feed(self, block: bytes) -> None:
+        block_lines = block.split(NEWLINE)
+        unfinished_line = block_lines.pop()
+        output_buffer = self._output_buffer
+        if block_lines and self._inside_line:
+            output_buffer += block_lines.pop(0)
+            output_buffer += NEWLINE
+            self._inside_line = False
+        if self._options.body_numbering == NUMBER_ALL_LINES:
+            self._number_all_complete_lines(block_lines)
+        else:
+            for line in block_lines:
+                self._start_line(line)
+                output_buffer += line
+                output_buffer += NEWLINE
+        if unfinished_line:
+            if not self._inside_line:
+                self._start_line(unfinished_line)
+            output_buffer += unfinished_line
+            self._inside_line = True
+        if len(output_buffer) >= NL_FLUSH_SIZE:
+            self.flush()
+
+    def finish(self) -> None:
+        # like nl, an unterminated last line is completed with a newline
+        if self._inside_line:
+            self._output_buffer += NEWLINE
+            self._inside_line = False
+        self.flush()
+
+    def flush(self) -> None:
+        if self._output_buffer:
+            self._output.write(self._output_buffer)
+            self._output.flush()
+            # buffer memory is reused for the next blocks
+            del self._output_buffer[:]
+
+
+def number_lines_in_blocks(
+    blocks: Iterable[bytes],
+    output: BinaryIO,
+    options: NLOptions,
+    flush_every_block: bool = False,
+) -> None:
+    line_numberer = LineNumberer(output, options)
+    try:
+        for block in blocks:
+            line_numberer.feed(block)
+            if flush_every_block:
+                line_numberer.flush()
+    finally:
+        line_numberer.finish()
+
+
+def run_on_file_path(file_path: FilePath, options: NLOptions = NLOptions()) -> None:
+    number_lines_in_blocks(iter_file_blocks(file_path), sys.stdout.buffer, options)
+
+
+def parse_lines_range(lines_range: str) -> Tuple[int, int]:
+    first_line, _, last_line = lines_range.partition(":")
+    try:
+        parsed_range = int(first_line), int(last_line)
+    except ValueError:
+        raise ValueError(f"Invalid lines range {lines_range}, expected FIRST:LAST")
+    if not 1 <= parsed_range[0] <= parsed_range[1]:
+        raise ValueError(
+            f"Invalid lines range {lines_range}, expected 1 <= FIRST <= LAST"
+        )
+    return parsed_range
+
+
+def count_numbered_lines(
+    lines_number: int, empty_lines_number: int, body_numbering: str
+) -> int:
+    if body_numbering == NUMBER_ALL_LINES:
+        return lines_number
+    if body_numbering == NUMBER_NON_EMPTY_LINES:
+        return lines_number - empty_lines_number
+    return 0
+
+
+def scan_lines_range(
+    file_path: FilePath, first_line: int, last_line: int
+) -> Tuple[int, int, int]:
+    """Byte range of lines first_line..last_line and the number of empty lines
+    before it, found in one pass over the file, without a line index"""
+    lines_before = first_line - 1
+    range_start: Optional[int] = None
+    empty_lines_before = 0
+    newlines_number = 0
+    previous_newline = -1
+    block_start = 0
+    for block in iter_file_blocks(file_path):
+        offsets = find_newline_offsets(block, block_start).tolist()
+        block_start += len(block)
+        if newlines_number < lines_before:
+            line_ends = offsets[: lines_before - newlines_number]
+            line_starts = [previous_newline, *line_ends[:-1]]
+            empty_lines_before += sum(
+                map((1).__eq__, map(operator.sub, line_ends, line_starts))
+            )
+        if range_start is None and newlines_number + len(offsets) >= lines_before:
+            range_start = (
+                offsets[lines_before - newlines_number - 1]
+                if lines_before > newlines_number
+                else previous_newline
+            ) + 1
+        if newlines_number + len(offsets) >= last_line:
+            return (
+                range_start,
+                offsets[last_line - newlines_number - 1] + 1,
+                empty_lines_before,
+            )
+        if offsets:
+            previous_newline = offsets[-1]
+        newlines_number += len(offsets)
+    # range goes past the last newline, it ends at the end of the file
+    if range_start is None:
+        range_start = block_start
+    return range_start, block_start, empty_lines_before
+
+
+def run_on_file_lines_range(
+    file_path: FilePath,
+    first_line: int,
+    last_line: int,
+    options: NLOptions = NLOptions(),
+) -> None:
     try:
-        user_file_path: Optional[str] = extract_user_input_from_arguments()
-    except ValueError as error:
-        print(error)
-        return
+        with LineIndex(file_path) as line_index:
+            range_start, range_end = line_index.get_lines_range(first_line, last_line)
+            lines_before = min(first_line - 1, line_index.lines_number)
+            empty_lines_before = (
+                line_index.count_empty_lines(lines_before)
+                if options.body_numbering == NUMBER_NON_EMPTY_LINES
+                else 0
+            )
+    except OSError:
+        # index can not be written next to a file in a read-only directory
+        range_start, range_end, empty_lines_before = scan_lines_range(
+            file_path, first_line, last_line
+        )
+        lines_before = first_line - 1
+    # lines keep the numbers they would get if the whole file was numbered
+    range_options = dataclasses.replace(
+        options,
+        starting_line_number=options.starting_line_number
+        + count_numbered_lines(lines_before, empty_lines_before, options.body_numbering)
+        * options.line_increment,
+    )
+    number_lines_in_blocks(
+        iter_file_blocks(file_path, range_start, range_end),
+        sys.stdout.buffer,
+        range_options,
+    )
 
+
+def run_on_lines_from_user(options: NLOptions = NLOptions()) -> None:
+    # interactive input is numbered line by line as it is typed
+    number_lines_in_blocks(
+        iter_stream_blocks(sys.stdin.buffer),
+        sys.stdout.buffer,
+        options,
+        flush_every_block=sys.stdin.isatty(),
+    )
+
+
+@click.command()
+@click.option("-v", "--starting-line-number", type=int, default=1)
+@click.option("-i", "--line-increment", type=int, default=1)
+@click.option("-w", "--number-width", type=click.IntRange(min=1), default=6)
+@click.option("-s", "--number-separator", type=str, default="\t")
+@click.option(
+    "-b",
+    "--body-numbering",
+    type=click.Choice([NUMBER_ALL_LINES, NUMBER_NON_EMPTY_LINES, NUMBER_NO_LINES]),
+    default=NUMBER_ALL_LINES,
+)
+@click.option("--range", "lines_range", type=str, default=None)
+@click.argument("user_file_path", required=False)
+def main(
+    starting_line_number: int,
+    line_increment: int,
+    number_width: int,
+    number_separator: str,
+    body_numbering: str,
+    lines_range: Optional[str],
+    user_file_path: Optional[str],
+) -> None:
+    options = NLOptions(
+        starting_line_number=starting_line_number,
+        line_increment=line_increment,
+        number_width=number_width,
+        number_separator=number_separator,
+        body_numbering=body_numbering,
+    )
     if user_file_path is not None:
         if not os.path.isfile(user_file_path):
             print(f"{user_file_path}: No such file or directory")
             return
-        run_on_file_path(user_file_path)
+        if lines_range is None:
+            run_on_file_path(user_file_path, options)
+            return
+        try:
+            first_line, last_line = parse_lines_range(lines_range)
+        except ValueError as error:
+            print(error)
+            return
+        run_on_file_lines_range(user_file_path, first_line, last_line, options)
     else:
         try:
-            run_on_lines_from_user()
+            run_on_lines_from_user(options)
         except KeyboardInterrupt:
             print("\n")
 
@@ -1,27 +1,90 @@
 import os
 import sys
+import click
+from collections import deque
+from dataclasses import dataclass
 from pydantic import FilePath
-from typing import List
-
+from typing import BinaryIO, Deque, Dict, Iterable, List, Optional
+from block_reader import iter_stream_blocks
+from line_index import LineIndex
+from file_watcher import create_file_watcher
 
 LAST_N_LINES_FROM_FILE = 10
 LAST_N_LINES_FROM_STDIN = 17
+TAIL_READ_BLOCK_SIZE = 64 * 1024
+STDIN_READ_SIZE = 1024 * 1024
+NEWLINE = b"\n"
 
 
-def imitate_tail_output_on_file(
+def read_tail_bytes(
+    file_path: FilePath,
+    tail_len: int = LAST_N_LINES_FROM_FILE,
+    block_size: int = TAIL_READ_BLOCK_SIZE,
+) -> bytes:
+    with open(file_path, "rb") as f:
+        file_size = f.seek(0, os.SEEK_END)
+        return read_tail_bytes_from_opened_file(f, file_size, tail_len, block_size)
+
+
+def read_tail_bytes_from_opened_file(
+    f: BinaryIO,
+    file_size: int,
+    tail_len: int = LAST_N_LINES_FROM_FILE,
+    block_size: int = TAIL_READ_BLOCK_SIZE,
+) -> bytes:
+    if tail_len <= 0 or file_size == 0:
+        return b""
+    f.seek(file_size - 1)
+    # newline which terminates the last line does not start a new one
+    newlines_to_find = tail_len + int(f.read(1) == NEWLINE)
+    found_newlines = 0
+    block_start = file_size
+    collected_blocks: List[bytes] = []
+    while block_start > 0 and found_newlines < newlines_to_find:
+        block_len = min(block_size, block_start)
+        block_start -= block_len
+        f.seek(block_start)
+        block = f.read(block_len)
+        collected_blocks.append(block)
+        found_newlines += block.count(NEWLINE)
+    tail_content = b"".join(reversed(collected_blocks))
+    if found_newlines < newlines_to_find:
+        return tail_content
+    cut_position = len(tail_content)
+    for _ in range(newlines_to_find):
+        cut_position = tail_content.rfind(NEWLINE, 0, cut_position)
+    return tail_content[cut_position + 1 :]
+
+
+def read_tail_bytes_with_index(
     file_path: FilePath, tail_len: int = LAST_N_LINES_FROM_FILE
-) -> None:
-    with open(file_path, "r") as f:
-        file_content = f.readlines()
-    tail_content = file_content[-tail_len:]
-    print("".join(tail_content))
+) -> bytes:
+    try:
+        with LineIndex(file_path) as line_index:
+            tail_start, tail_end = line_index.get_tail_range(tail_len)
+    except OSError:
+        # index can not be written next to a file in a read-only directory
+        return read_tail_bytes(file_path, tail_len)
+    with open(file_path, "rb") as f:
+        f.seek(tail_start)
+        return f.read(tail_end - tail_start)
 
 
-def read_user_input_files() -> List[str]:
-    return sys.argv[1:]
+def imitate_tail_output_on_file(
+    file_path: FilePath, tail_len: int = LAST_N_LINES_FROM_FILE, use_index: bool = False
+) -> None:
+    if use_index:
+        tail_content = read_tail_bytes_with_index(file_path, tail_len)
+    else:
+        tail_content = read_tail_bytes(file_path, tail_len)
+    print(tail_content.decode(errors="replace"))
 
 
-def run_tail_scenario_on_files(user_input_files: List[str]) -> None:
+def run_tail_scenario_on_files(
+    user_input_files: List[str],
+    tail_len: int = LAST_N_LINES_FROM_FILE,
+    use_index: bool = False,
+) -> None:
     should_print_file_names = len(user_input_files) > 1
     for user_file in user_input_files:
         if not os.path.isfile(user_file):
@@ -29,26 +92,218 @@ def run_tail_scenario_on_files(user_input_files: List[str]) -> None:
             continue
         if should_print_file_names:
             print(f"==> {user_file} <==")
-        imitate_tail_output_on_file(user_file)
+        imitate_tail_output_on_file(user_file, tail_len, use_index)
 
 
-def run_tail_scenario_on_user_input(tail_len: int = LAST_N_LINES_FROM_STDIN):
-    collected_user_lines: List[str] = []
+@dataclass
+class FollowedFile:
+    path: str
+    file: Optional[BinaryIO] = None
+    position: int = 0
+    inode: int = -1
+    device: int = -1
+
+    def open(self) -> bool:
+        try:
+            self.file = open(self.path, "rb", buffering=0)
+        except OSError:
+            return False
+        file_stat = os.fstat(self.file.fileno())
+        self.inode, self.device = file_stat.st_ino, file_stat.st_dev
+        self.position = 0
+        return True
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def read_appended_bytes(self) -> bytes:
+        if self.file is None:
+            return b""
+        file_size = os.fstat(self.file.fileno()).st_size
+        if file_size < self.position:
+            print(f"tail: {self.path}: file truncated", file=sys.stderr)
+            self.position = 0
+        self.file.seek(self.position)
+        appended_blocks: List[bytes] = []
+        while block := self.file.read(TAIL_READ_BLOCK_SIZE):
+            appended_blocks.append(block)
+            self.position += len(block)
+        return b"".join(appended_blocks)
+
+    def is_replaced(self) -> bool:
+        try:
+            path_stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (path_stat.st_ino, path_stat.st_dev) != (self.inode, self.device)
+
+
+class TailFollower:
+    def __init__(self, file_paths: List[str], tail_len: int) -> None:
+        self._should_print_file_names = len(file_paths) > 1
+        self._last_printed_path: Optional[str] = None
+        self._followed_files: Dict[str, FollowedFile] = {}
+        for file_path in file_paths:
+            followed_file = FollowedFile(path=file_path)
+            self._followed_files[os.path.abspath(file_path)] = followed_file
+            self._print_initial_tail(followed_file, tail_len)
+
+    def _write(self, followed_file: FollowedFile, data: bytes) -> None:
+        if not data:
+            return
+        output = sys.stdout.buffer
+        if (
+            self._should_print_file_names
+            and self._last_printed_path != followed_file.path
+        ):
+            output.write(f"\n==> {followed_file.path} <==\n".encode())
+        self._last_printed_path = followed_file.path
+        output.write(data)
+        output.flush()
+
+    def _print_initial_tail(self, followed_file: FollowedFile, tail_len: int) -> None:
+        if not followed_file.open():
+            print(
+                f"tail: cannot open '{followed_file.path}' for reading", file=sys.stderr
+            )
+            return
+        file_size = os.fstat(followed_file.file.fileno()).st_size
+        if self._should_print_file_names:
+            header = "" if self._last_printed_path is None else "\n"
+            sys.stdout.buffer.write(f"{header}==> {followed_file.path} <==\n".encode())
+            self._last_printed_path = followed_file.path
+        sys.stdout.buffer.write(
+            read_tail_bytes_from_opened_file(followed_file.file, file_size, tail_len)
+        )
+        sys.stdout.buffer.flush()
+        followed_file.position = file_size
+
+    def _check_file(self, followed_file: FollowedFile) -> None:
+        self._write(followed_file, followed_file.read_appended_bytes())
+        if followed_file.file is not None and not followed_file.is_replaced():
+            return
+        # rotated or not opened yet, everything left in the old file is printed above
+        had_file = followed_file.file is not None
+        followed_file.close()
+        if not followed_file.open():
+            return
+        if had_file:
+            print(
+                f"tail: '{followed_file.path}' has been replaced; following new file",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                f"tail: '{followed_file.path}' has appeared; following new file",
+                file=sys.stderr,
+            )
+        self._write(followed_file, followed_file.read_appended_bytes())
+
+    def follow(self) -> None:
+        watcher = create_file_watcher(self._followed_files.keys())
+        try:
+            while True:
+                changed_paths = watcher.wait_for_changes()
+                if changed_paths is None:
+                    files_to_check = list(self._followed_files.values())
+                else:
+                    files_to_check = [
+                        self._followed_files[path]
+                        for path in changed_paths
+                        if path in self._followed_files
+                    ]
+                for followed_file in files_to_check:
+                    self._check_file(followed_file)
+        finally:
+            watcher.close()
+            for followed_file in self._followed_files.values():
+                followed_file.close()
+
+
+def run_tail_follow_scenario_on_files(
+    user_input_files: List[str], tail_len: int = LAST_N_LINES_FROM_FILE
+) -> None:
+    follower = TailFollower(user_input_files, tail_len)
     try:
-        while True:
-            user_line = input()
-            collected_user_lines.append(user_line)
-    except EOFError:
-        tail_content = collected_user_lines[-tail_len:]
-        print("\n".join(tail_content))
-
-
-def main() -> None:
-    user_files = read_user_input_files()
-    if user_files:
-        run_tail_scenario_on_files(user_files)
+        follower.follow()
+    except KeyboardInterrupt:
+        pass
+
+
+class LastLinesCollector:
+    """Keeps the last N lines of the fed blocks in a fixed-size ring buffer"""
+
+    def __init__(self, tail_len: int) -> None:
+        self._tail_len = tail_len
+        self._last_lines: Deque[bytes] = deque(maxlen=max(tail_len, 0))
+        # the line which is still being read is kept apart from the ring buffer
+        self._unfinished_line_parts: List[bytes] = []
+
+    def feed(self, block: bytes) -> None:
+        if self._tail_len <= 0:
+            return
+        block_lines = block.split(NEWLINE)
+        self._unfinished_line_parts.append(block_lines.pop(0))
+        if not block_lines:
+            return
+        # block contains a newline, so the unfinished line is complete now
+        self._last_lines.append(b"".join(self._unfinished_line_parts))
+        self._unfinished_line_parts = [block_lines.pop()]
+        self._last_lines.extend(block_lines[-self._tail_len :])
+
+    def finish(self) -> List[bytes]:
+        unfinished_line = b"".join(self._unfinished_line_parts)
+        self._unfinished_line_parts = []
+        if unfinished_line and self._tail_len > 0:
+            self._last_lines.append(unfinished_line)
+        return list(self._last_lines)
+
+
+def collect_last_lines_from_blocks(
+    blocks: Iterable[bytes], tail_len: int
+) -> List[bytes]:
+    last_lines_collector = LastLinesCollector(tail_len)
+    for block in blocks:
+        last_lines_collector.feed(block)
+    return last_lines_collector.finish()
+
+
+def format_last_lines(last_lines: List[bytes]) -> str:
+    return NEWLINE.join(last_lines).decode(errors="replace")
+
+
+def run_tail_scenario_on_user_input(tail_len: int = LAST_N_LINES_FROM_STDIN):
+    tail_content = collect_last_lines_from_blocks(
+        iter_stream_blocks(sys.stdin.buffer, STDIN_READ_SIZE), tail_len
+    )
+    print(format_last_lines(tail_content))
+
+
+@click.command()
+@click.option("-n", "--lines", "tail_len", type=click.IntRange(min=0), default=None)
+@click.option("-f", "--follow", is_flag=True, default=False)
+@click.option("--use-index", is_flag=True, default=False)
+@click.argument("user_files", nargs=-1)
+def main(
+    tail_len: Optional[int], follow: bool, use_index: bool, user_files: List[str]
+) -> None:
+    if user_files and follow:
+        run_tail_follow_scenario_on_files(
+            list(user_files),
+            LAST_N_LINES_FROM_FILE if tail_len is None else tail_len,
+        )
+    elif user_files:
+        run_tail_scenario_on_files(
+            list(user_files),
+            LAST_N_LINES_FROM_FILE if tail_len is None else tail_len,
+            use_index,
+        )
     else:
-        run_tail_scenario_on_user_input()
+        run_tail_scenario_on_user_input(
+            LAST_N_LINES_FROM_STDIN if tail_len is None else tail_len
+        )
 
 
 if __name__ == "__main__":
@@ -1,8 +1,30 @@
 import os
 import sys
+import json
+import click
+import threading
+import contextlib
+import operator
+import concurrent.futures
+from functools import reduce
 from pydantic import FilePath
-from dataclasses import dataclass
-from typing import List
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+from block_reader import compute_tail_checksum, iter_file_blocks, iter_stream_blocks
+
+WC_READ_BLOCK_SIZE = 8 * 1024 * 1024
+PARALLEL_WC_MIN_FILE_SIZE = 64 * 1024 * 1024
+WC_WORKERS_NUM = os.cpu_count() or 1
+WC_INDEX_DEFAULT_PATH = ".wc_index.json"
+WC_INDEX_VERSION = 1
+WHITESPACE_BYTES = b" \t\n\r\v\f"
+SPACE_MARK = ord(" ")
+WORD_MARK = ord("w")
+# maps every byte either to a space or to a word mark, so word starts
+# can be counted as occurrences of b" w" with a single C-level scan
+WORD_MARKS_TABLE = bytes(
+    SPACE_MARK if byte in WHITESPACE_BYTES else WORD_MARK for byte in range(256)
+)
 
 
 @dataclass
@@ -23,60 +45,300 @@ class WCLikeStats:
         return sum
 
 
-def collect_wc_stats_from_lines(text_lines: List[str]) -> WCLikeStats:
-    word_number = 0
-    symbols_number = 0
-    for line in text_lines:
-        words = line.rstrip().split(" ")
-        word_number += len(words)
-        symbols_number += len(line)
+@dataclass
+class WCChunkStats:
+    """Stats of a contiguous piece of input, words are counted as if the piece
+    was standalone, edge flags allow to merge words split between pieces"""
+
+    stats: WCLikeStats = field(
+        default_factory=lambda: WCLikeStats(
+            word_number=0, lines_number=0, symbols_number=0
+        )
+    )
+    starts_inside_word: bool = False
+    ends_inside_word: bool = False
+
+    def __add__(self, other: "WCChunkStats") -> "WCChunkStats":
+        if other.stats.symbols_number == 0:
+            return self
+        if self.stats.symbols_number == 0:
+            return other
+        stats = self.stats + other.stats
+        if self.ends_inside_word and other.starts_inside_word:
+            stats.word_number -= 1
+        return WCChunkStats(
+            stats=stats,
+            starts_inside_word=self.starts_inside_word,
+            ends_inside_word=other.ends_inside_word,
+        )
+
 
+def collect_wc_stats_from_block(block: bytes) -> WCChunkStats:
+    if not block:
+        return WCChunkStats()
+    word_marks = block.translate(WORD_MARKS_TABLE)
+    starts_inside_word = word_marks[0] == WORD_MARK
     stats = WCLikeStats(
-        word_number=word_number,
-        lines_number=len(text_lines),
-        symbols_number=symbols_number,
+        word_number=word_marks.count(b" w") + int(starts_inside_word),
+        lines_number=block.count(b"\n"),
+        symbols_number=len(block),
+    )
+    return WCChunkStats(
+        stats=stats,
+        starts_inside_word=starts_inside_word,
+        ends_inside_word=word_marks[-1] == WORD_MARK,
     )
-    return stats
 
 
-def collect_wc_stats_from_file(file_path: FilePath) -> WCLikeStats:
-    with open(file_path, "r") as f:
-        file_lines = f.readlines()
-    return collect_wc_stats_from_lines(file_lines)
+class WCStatsCollector:
+    def __init__(self) -> None:
+        self.chunk_stats = WCChunkStats()
 
+    def feed(self, block: bytes) -> None:
+        self.chunk_stats += collect_wc_stats_from_block(block)
 
-def run_wc_scenario_on_files(user_input: List[str]) -> None:
-    total_stats = WCLikeStats(lines_number=0, word_number=0, symbols_number=0)
-    for file_path in user_input:
+    def finish(self) -> WCLikeStats:
+        return self.chunk_stats.stats
+
+
+def collect_wc_stats_from_blocks(blocks: Iterable[bytes]) -> WCChunkStats:
+    wc_stats_collector = WCStatsCollector()
+    for block in blocks:
+        wc_stats_collector.feed(block)
+    return wc_stats_collector.chunk_stats
+
+
+def collect_wc_stats_from_stream(
+    stream: BinaryIO, block_size: int = WC_READ_BLOCK_SIZE
+) -> WCChunkStats:
+    return collect_wc_stats_from_blocks(iter_stream_blocks(stream, block_size))
+
+
+def collect_wc_stats_from_file_range(
+    file_path: FilePath, start: int, end: int, block_size: int = WC_READ_BLOCK_SIZE
+) -> WCChunkStats:
+    return collect_wc_stats_from_blocks(
+        iter_file_blocks(file_path, start, end, block_size)
+    )
+
+
+def split_file_into_ranges(file_size: int, ranges_num: int) -> List[Tuple[int, int]]:
+    range_len = -(-file_size // ranges_num)
+    return [
+        (range_start, min(range_start + range_len, file_size))
+        for range_start in range(0, file_size, range_len)
+    ]
+
+
+def collect_wc_chunk_stats_from_file_range(
+    file_path: FilePath, start: int, end: int, workers_num: int = WC_WORKERS_NUM
+) -> WCChunkStats:
+    if workers_num <= 1 or end - start < PARALLEL_WC_MIN_FILE_SIZE:
+        return collect_wc_stats_from_file_range(file_path, start, end)
+    file_ranges = [
+        (start + range_start, start + range_end)
+        for range_start, range_end in split_file_into_ranges(end - start, workers_num)
+    ]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers_num) as executor:
+        chunks_stats = executor.map(
+            collect_wc_stats_from_file_range,
+            [file_path] * len(file_ranges),
+            [range_start for range_start, _ in file_ranges],
+            [range_end for _, range_end in file_ranges],
+        )
+        # ranges are merged in file order, so split words are joined correctly
+        return reduce(operator.add, chunks_stats, WCChunkStats())
+
+
+def collect_wc_stats_from_file(
+    file_path: FilePath, workers_num: int = WC_WORKERS_NUM
+) -> WCLikeStats:
+    if not os.path.isfile(file_path):
+        with open(file_path, "rb") as f:
+            return collect_wc_stats_from_stream(f).stats
+    file_size = os.path.getsize(file_path)
+    return collect_wc_chunk_stats_from_file_range(
+        file_path, 0, file_size, workers_num
+    ).stats
+
+
+@dataclass
+class WCIndexEntry:
+    device: int
+    inode: int
+    offset: int
+    tail_checksum: int
+    chunk_stats: WCChunkStats
+
+    @classmethod
+    def from_json(cls, entry_json: Dict) -> "WCIndexEntry":
+        chunk_stats_json = entry_json["chunk_stats"]
+        return cls(
+            device=entry_json["device"],
+            inode=entry_json["inode"],
+            offset=entry_json["offset"],
+            tail_checksum=entry_json["tail_checksum"],
+            chunk_stats=WCChunkStats(
+                stats=WCLikeStats(**chunk_stats_json["stats"]),
+                starts_inside_word=chunk_stats_json["starts_inside_word"],
+                ends_inside_word=chunk_stats_json["ends_inside_word"],
+            ),
+        )
+
+
+class WCCheckpointIndex:
+    """Stats of already counted file prefixes, so append-only files are
+    recounted only from the last checkpoint offset"""
+
+    def __init__(self, index_path: FilePath) -> None:
+        self._index_path = index_path
+        self._entries: Dict[str, WCIndexEntry] = {}
+        self._lock = threading.Lock()
+        if os.path.isfile(index_path):
+            try:
+                self._entries = self._read_entries(index_path)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # index is only a cache, a broken or foreign one means that
+                # every file is counted from scratch
+                self._entries = {}
+
+    @staticmethod
+    def _read_entries(index_path: FilePath) -> Dict[str, WCIndexEntry]:
+        with open(index_path) as f:
+            index_json = json.load(f)
+        if index_json.get("version") != WC_INDEX_VERSION:
+            return {}
+        return {
+            file_path: WCIndexEntry.from_json(entry_json)
+            for file_path, entry_json in index_json["files"].items()
+        }
+
+    def _get_valid_entry(
+        self, file_path: FilePath, file_stat: os.stat_result
+    ) -> Optional[WCIndexEntry]:
+        entry = self._entries.get(os.path.abspath(file_path))
+        if entry is None:
+            return None
+        if (entry.device, entry.inode) != (file_stat.st_dev, file_stat.st_ino):
+            return None
+        if file_stat.st_size < entry.offset:
+            return None
+        if compute_tail_checksum(file_path, entry.offset) != entry.tail_checksum:
+            return None
+        return entry
+
+    def collect_wc_stats_from_file(
+        self, file_path: FilePath, workers_num: int = WC_WORKERS_NUM
+    ) -> WCLikeStats:
         if not os.path.isfile(file_path):
-            print(f"{file_path}: No such file or directory")
-        file_stat = collect_wc_stats_from_file(file_path)
-        total_stats += file_stat
-        print(f"{file_stat} {file_path}")
-    if len(user_input) > 1:
-        print(f"{total_stats} total")
+            return collect_wc_stats_from_file(file_path, workers_num)
+        file_stat = os.stat(file_path)
+        entry = self._get_valid_entry(file_path, file_stat)
+        if entry is None:
+            # new, truncated or replaced file is counted from scratch
+            chunk_stats = collect_wc_chunk_stats_from_file_range(
+                file_path, 0, file_stat.st_size, workers_num
+            )
+        else:
+            chunk_stats = entry.chunk_stats + collect_wc_chunk_stats_from_file_range(
+                file_path, entry.offset, file_stat.st_size, workers_num
+            )
+        new_entry = WCIndexEntry(
+            device=file_stat.st_dev,
+            inode=file_stat.st_ino,
+            offset=file_stat.st_size,
+            tail_checksum=compute_tail_checksum(file_path, file_stat.st_size),
+            chunk_stats=chunk_stats,
+        )
+        with self._lock:
+            self._entries[os.path.abspath(file_path)] = new_entry
+        return chunk_stats.stats
 
+    def save(self) -> None:
+        with self._lock:
+            index_json = {
+                "version": WC_INDEX_VERSION,
+                "files": {
+                    file_path: asdict(entry)
+                    for file_path, entry in self._entries.items()
+                },
+            }
+        # index is replaced atomically, so an interrupted run cannot corrupt it
+        temp_index_path = f"{self._index_path}.tmp"
+        with open(temp_index_path, "w") as f:
+            json.dump(index_json, f)
+        os.replace(temp_index_path, self._index_path)
 
-def run_wc_scenario_on_user_input() -> None:
-    collected_user_lines: List[str] = []
+
+def try_collect_wc_stats_from_file(
+    file_path: FilePath,
+    workers_num: int = WC_WORKERS_NUM,
+    checkpoint_index: Optional[WCCheckpointIndex] = None,
+) -> Union[WCLikeStats, OSError]:
+    # the error is returned, so the caller reports it in the files order
     try:
-        while True:
-            user_line = input()
-            user_line += "\n"
-            collected_user_lines.append(user_line)
-    except EOFError:
-        stat = collect_wc_stats_from_lines(collected_user_lines)
-        print(stat)
+        if checkpoint_index is not None:
+            return checkpoint_index.collect_wc_stats_from_file(file_path, workers_num)
+        return collect_wc_stats_from_file(file_path, workers_num)
+    except OSError as error:
+        return error
 
 
-def read_user_input_files() -> List[str]:
-    return sys.argv[1:]
+def run_wc_scenario_on_files(
+    user_input: List[str],
+    jobs_num: int = 1,
+    checkpoint_index: Optional[WCCheckpointIndex] = None,
+) -> None:
+    total_stats = WCLikeStats(lines_number=0, word_number=0, symbols_number=0)
+    with contextlib.ExitStack() as stack:
+        if jobs_num > 1:
+            # small files are dominated by open/read latency, so threads are
+            # enough, every file is counted by a single worker then
+            executor = stack.enter_context(
+                concurrent.futures.ThreadPoolExecutor(max_workers=jobs_num)
+            )
+            files_stats = executor.map(
+                try_collect_wc_stats_from_file,
+                user_input,
+                [1] * len(user_input),
+                [checkpoint_index] * len(user_input),
+            )
+        else:
+            files_stats = map(
+                try_collect_wc_stats_from_file,
+                user_input,
+                [WC_WORKERS_NUM] * len(user_input),
+                [checkpoint_index] * len(user_input),
+            )
+        # map keeps arguments order, so lines are printed as files were passed
+        for file_path, file_stat in zip(user_input, files_stats):
+            if isinstance(file_stat, OSError):
+                print(f"wc: {file_path}: {file_stat.strerror}", file=sys.stderr)
+                continue
+            total_stats += file_stat
+            print(f"{file_stat} {file_path}")
+    if len(user_input) > 1:
+        print(f"{total_stats} total")
+    if checkpoint_index is not None:
+        checkpoint_index.save()
+
+
+def run_wc_scenario_on_user_input() -> None:
+    stat = collect_wc_stats_from_stream(sys.stdin.buffer).stats
+    print(stat)
 
 
-def main() -> None:
-    user_files = read_user_input_files()
+@click.command()
+@click.option("-j", "--jobs", "jobs_num", type=click.IntRange(min=1), default=1)
+@click.option("--incremental", is_flag=True, default=False)
+@click.option("--index-file", type=str, default=WC_INDEX_DEFAULT_PATH)
+@click.argument("user_files", nargs=-1)
+def main(
+    jobs_num: int, incremental: bool, index_file: str, user_files: List[str]
+) -> None:
     if user_files:
-        run_wc_scenario_on_files(user_files)
+        checkpoint_index = WCCheckpointIndex(index_file) if incremental else None
+        run_wc_scenario_on_files(list(user_files), jobs_num, checkpoint_index)
     else:
         run_wc_scenario_on_user_input()
 
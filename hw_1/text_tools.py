@@ -0,0 +1,68 @@
+import os
+import sys
+import click
+from typing import Optional
+from block_reader import READ_BLOCK_SIZE, iter_input_blocks
+from task1 import LineNumberer, NLOptions
+from task2 import LastLinesCollector, format_last_lines
+from task3 import WCStatsCollector
+
+
+def print_section_header(tool_name: str, should_print_header: bool) -> None:
+    if should_print_header:
+        print(f"==> {tool_name} <==", flush=True)
+
+
+def run_tools_in_single_pass(
+    user_file_path: Optional[str],
+    with_nl: bool,
+    with_wc: bool,
+    tail_len: Optional[int],
+    block_size: int = READ_BLOCK_SIZE,
+) -> None:
+    line_numberer = LineNumberer(sys.stdout.buffer, NLOptions()) if with_nl else None
+    wc_stats_collector = WCStatsCollector() if with_wc else None
+    last_lines_collector = (
+        LastLinesCollector(tail_len) if tail_len is not None else None
+    )
+    consumers = [
+        consumer
+        for consumer in (line_numberer, wc_stats_collector, last_lines_collector)
+        if consumer is not None
+    ]
+    should_print_headers = len(consumers) > 1
+
+    # numbered lines are streamed while reading, other tools report at the end
+    print_section_header("nl", should_print_headers and with_nl)
+    for block in iter_input_blocks(user_file_path, sys.stdin.buffer, block_size):
+        for consumer in consumers:
+            consumer.feed(block)
+    if line_numberer is not None:
+        line_numberer.finish()
+    if wc_stats_collector is not None:
+        print_section_header("wc", should_print_headers)
+        file_name_suffix = "" if user_file_path is None else f" {user_file_path}"
+        print(f"{wc_stats_collector.finish()}{file_name_suffix}")
+    if last_lines_collector is not None:
+        print_section_header("tail", should_print_headers)
+        print(format_last_lines(last_lines_collector.finish()))
+
+
+@click.command()
+@click.option("--nl", "with_nl", is_flag=True, default=False)
+@click.option("--wc", "with_wc", is_flag=True, default=False)
+@click.option("--tail", "tail_len", type=click.IntRange(min=0), default=None)
+@click.argument("user_file_path", required=False)
+def main(
+    with_nl: bool, with_wc: bool, tail_len: Optional[int], user_file_path: Optional[str]
+) -> None:
+    if not (with_nl or with_wc or tail_len is not None):
+        raise click.UsageError("At least one of --nl, --wc, --tail should be provided")
+    if user_file_path is not None and not os.path.isfile(user_file_path):
+        print(f"{user_file_path}: No such file or directory")
+        return
+    run_tools_in_single_pass(user_file_path, with_nl, with_wc, tail_len)
+
+
+if __name__ == "__main__":
+    main()
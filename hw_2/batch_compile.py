@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import click
+from pathlib import Path
+from dataclasses import asdict
+from typing import List, Optional, Tuple
+from latex_module.pdf_batch import (
+    COMPILE_TIMEOUT_SECONDS,
+    LATEX_ENGINE,
+    CompileResult,
+    compile_tex_batch,
+)
+from latex_module.pdf_cache import PDFBuildCache
+
+
+def print_compile_results(results: List[CompileResult]) -> None:
+    for result in results:
+        status = "CACHED" if result.from_cache else "OK" if result.succeeded else "FAIL"
+        print(f"{status:6s} {result.elapsed_seconds:8.2f} s  {result.tex_path}")
+        if not result.succeeded:
+            print(f"       {result.error}")
+            for log_line in result.log_excerpt.splitlines():
+                print(f"       | {log_line}")
+    failed_num = sum(not result.succeeded for result in results)
+    total_seconds = sum(result.elapsed_seconds for result in results)
+    print(
+        f"{len(results)} jobs, {failed_num} failed, "
+        f"{total_seconds:.2f} s of compilation in total"
+    )
+
+
+@click.command()
+@click.argument("tex_files", nargs=-1, type=Path)
+@click.option("--output_dir", type=Path, default=None)
+@click.option("--workers", type=click.IntRange(min=1), default=os.cpu_count() or 1)
+@click.option("--engine", type=str, default=LATEX_ENGINE)
+@click.option("--timeout", type=float, default=COMPILE_TIMEOUT_SECONDS)
+@click.option("--cache_dir", type=Path, default=None)
+@click.option("--report", type=Path, default=None)
+def run(
+    tex_files: Tuple[Path, ...],
+    output_dir: Optional[Path],
+    workers: int,
+    engine: str,
+    timeout: float,
+    cache_dir: Optional[Path],
+    report: Optional[Path],
+):
+    build_cache = PDFBuildCache(cache_dir, engine=engine) if cache_dir else None
+    results = compile_tex_batch(
+        [str(tex_file) for tex_file in tex_files],
+        output_dir=output_dir,
+        workers_num=workers,
+        build_cache=build_cache,
+        engine=engine,
+        timeout=timeout,
+    )
+    print_compile_results(results)
+    if report is not None:
+        with open(report, "w") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+    if not all(result.succeeded for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import platform
+import datetime
+import statistics
+import tracemalloc
+import click
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Tuple
+from latex_module.latex_utils import create_latex_table
+from latex_module.document_builder import LatexDocumentBuilder
+from latex_module.pdf_batch import compile_tex_in_isolation
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACTS_DIR = os.path.join(SCRIPT_DIR, "artifacts")
+TEX_IMAGE_PATH = os.path.join(SCRIPT_DIR, "assets", "real.jpg")
+DEFAULT_REPORT_PATH = os.path.join(ARTIFACTS_DIR, "benchmark.json")
+STUB_PDF_CONTENT = b"%PDF-1.4\n%stub compiler output\n%%EOF\n"
+STAGES = ["table_generation", "document_assembly", "file_write", "pdf_compile"]
+
+
+@dataclass
+class StageMeasurement:
+    median_seconds: float
+    peak_memory_kb: float
+
+
+@dataclass
+class BenchmarkResult:
+    rows: int
+    columns: int
+    images: int
+    tex_bytes: int
+    stages: Dict[str, StageMeasurement]
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stage.median_seconds for stage in self.stages.values())
+
+
+def stub_compile_tex_to_pdf(tex_path: str) -> str:
+    pdf_path = os.path.splitext(tex_path)[0] + ".pdf"
+    with open(pdf_path, "wb") as f:
+        f.write(STUB_PDF_CONTENT)
+    return pdf_path
+
+
+def pdflatex_compile_tex_to_pdf(tex_path: str) -> str:
+    result = compile_tex_in_isolation(tex_path)
+    if not result.succeeded:
+        raise RuntimeError(f"{tex_path}: {result.error}\n{result.log_excerpt}")
+    return result.pdf_path
+
+
+COMPILERS: Dict[str, Callable[[str], str]] = {
+    "stub": stub_compile_tex_to_pdf,
+    "pdflatex": pdflatex_compile_tex_to_pdf,
+}
+
+
+def generate_table_data(rows: int, columns: int) -> List[List[str]]:
+    return [[f"r{row}c{column}" for column in range(columns)] for row in range(rows)]
+
+
+def measure_stage(stage: Callable, runs: int):
+    timings: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        stage_output = stage()
+        timings.append(time.perf_counter() - start)
+    # tracing slows allocations down, so memory is measured in a separate run
+    tracemalloc.start()
+    stage()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return stage_output, StageMeasurement(
+        median_seconds=statistics.median(timings), peak_memory_kb=peak_memory / 1024
+    )
+
+
+def run_single_benchmark(
+    rows: int,
+    columns: int,
+    images: int,
+    runs: int,
+    compile_function: Callable[[str], str],
+    work_dir: str,
+) -> BenchmarkResult:
+    table_data = generate_table_data(rows, columns)
+    tex_path = os.path.join(work_dir, f"bench_{rows}x{columns}_{images}img.tex")
+    stages: Dict[str, StageMeasurement] = {}
+
+    latex_table, stages["table_generation"] = measure_stage(
+        lambda: create_latex_table(table_data), runs
+    )
+
+    def assemble_document() -> LatexDocumentBuilder:
+        document_builder = LatexDocumentBuilder()
+        for _ in range(images):
+            document_builder.add_image(TEX_IMAGE_PATH)
+        document_builder.add(latex_table)
+        return document_builder
+
+    document_builder, stages["document_assembly"] = measure_stage(
+        assemble_document, runs
+    )
+    _, stages["file_write"] = measure_stage(
+        lambda: document_builder.write(tex_path), runs
+    )
+    _, stages["pdf_compile"] = measure_stage(lambda: compile_function(tex_path), runs)
+    return BenchmarkResult(
+        rows=rows,
+        columns=columns,
+        images=images,
+        tex_bytes=os.path.getsize(tex_path),
+        stages=stages,
+    )
+
+
+def format_markdown_report(results: List[BenchmarkResult]) -> str:
+    header = (
+        ["rows", "cols", "images", "tex KB"]
+        + [f"{stage} (s)" for stage in STAGES]
+        + ["peak KB", "compile share"]
+    )
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "---|" * len(header),
+    ]
+    for result in results:
+        peak_memory_kb = max(stage.peak_memory_kb for stage in result.stages.values())
+        compile_share = result.stages["pdf_compile"].median_seconds / max(
+            result.total_seconds, 1e-12
+        )
+        cells = [
+            str(result.rows),
+            str(result.columns),
+            str(result.images),
+            f"{result.tex_bytes / 1024:.1f}",
+        ]
+        cells += [f"{result.stages[stage].median_seconds:.4f}" for stage in STAGES]
+        cells += [f"{peak_memory_kb:.0f}", f"{compile_share:.0%}"]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(
+    results: List[BenchmarkResult], compiler: str, report_path: Path
+) -> None:
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "compiler": compiler,
+        "results": [asdict(result) for result in results],
+    }
+    os.makedirs(report_path.parent, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    with open(report_path.with_suffix(".md"), "w") as f:
+        f.write(f"COMPILER = {compiler}\n")
+        f.write("TABLE:\n")
+        f.write(format_markdown_report(results))
+
+
+@click.command()
+@click.option("--rows", type=int, multiple=True, default=[10, 1000, 10000])
+@click.option("--columns", type=int, multiple=True, default=[2, 10])
+@click.option("--images", type=int, multiple=True, default=[0, 1, 5])
+@click.option("--runs", type=click.IntRange(min=1), default=3)
+@click.option("--compiler", type=click.Choice(list(COMPILERS)), default="stub")
+@click.option("--output", type=Path, default=Path(DEFAULT_REPORT_PATH))
+def run(
+    rows: Tuple[int, ...],
+    columns: Tuple[int, ...],
+    images: Tuple[int, ...],
+    runs: int,
+    compiler: str,
+    output: Path,
+):
+    results: List[BenchmarkResult] = []
+    work_dir = tempfile.mkdtemp(prefix="hw2_benchmark_")
+    try:
+        for rows_num in rows:
+            for columns_num in columns:
+                for images_num in images:
+                    results.append(
+                        run_single_benchmark(
+                            rows_num,
+                            columns_num,
+                            images_num,
+                            runs,
+                            COMPILERS[compiler],
+                            work_dir,
+                        )
+                    )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    write_report(results, compiler, output)
+    print(format_markdown_report(results))
+
+
+if __name__ == "__main__":
+    run()
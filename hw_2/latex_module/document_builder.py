@@ -0,0 +1,86 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from pydantic import FilePath
+from latex_module.latex_utils import (
+    create_centered_cells_header,
+    form_latex_row,
+    latex_img_with_includegraphix,
+    write_latex_table,
+)
+
+
+class ChunksSink:
+    """File-like object which keeps written strings as separate chunks"""
+
+    def __init__(self, chunks: List[str]) -> None:
+        self._chunks = chunks
+
+    def write(self, chunk: str) -> int:
+        self._chunks.append(chunk)
+        return len(chunk)
+
+
+class LatexDocumentBuilder:
+    def __init__(
+        self, document_class: str = "article", class_options: Optional[str] = None
+    ) -> None:
+        self._document_class = document_class
+        self._class_options = class_options
+        # dict keeps packages in the order they were requested
+        self._packages: Dict[str, Optional[str]] = {}
+        self._body_chunks: List[str] = []
+
+    def use_package(
+        self, package: str, options: Optional[str] = None
+    ) -> "LatexDocumentBuilder":
+        if package in self._packages and self._packages[package] != options:
+            raise ValueError(
+                f"Package {package} is already used with options {self._packages[package]}"
+            )
+        self._packages[package] = options
+        return self
+
+    def add(self, fragment: str) -> "LatexDocumentBuilder":
+        self._body_chunks.append(fragment)
+        if not fragment.endswith("\n"):
+            self._body_chunks.append("\n")
+        return self
+
+    def add_image(self, image_path: FilePath) -> "LatexDocumentBuilder":
+        self.use_package("graphicx")
+        return self.add(latex_img_with_includegraphix(image_path))
+
+    def add_table(
+        self,
+        table_rows: Iterable[List[str]],
+        header_generator: Callable[[int], str] = create_centered_cells_header,
+        row_generator: Callable[[List[str]], str] = form_latex_row,
+    ) -> "LatexDocumentBuilder":
+        # table is kept as the chunks written by the streaming table writer
+        write_latex_table(
+            table_rows, ChunksSink(self._body_chunks), header_generator, row_generator
+        )
+        return self
+
+    def _format_declaration(
+        self, command: str, name: str, options: Optional[str]
+    ) -> str:
+        options_repr = f"[{options}]" if options is not None else ""
+        return f"\\{command}{options_repr}{{{name}}}\n"
+
+    def iter_chunks(self) -> Iterator[str]:
+        yield self._format_declaration(
+            "documentclass", self._document_class, self._class_options
+        )
+        for package, options in self._packages.items():
+            yield self._format_declaration("usepackage", package, options)
+        yield "\\begin{document}\n"
+        yield from self._body_chunks
+        yield "\\end{document}\n"
+
+    def build(self) -> str:
+        return "".join(self.iter_chunks())
+
+    def write(self, file_path: FilePath) -> None:
+        # chunks go to the file one by one, the document is never joined
+        with open(file_path, "w") as f:
+            f.writelines(self.iter_chunks())
@@ -0,0 +1,118 @@
+import os
+import math
+import shutil
+import hashlib
+import concurrent.futures
+from dataclasses import dataclass, astuple
+from pydantic import FilePath, DirectoryPath
+from typing import Dict, List, Optional
+from PIL import Image
+
+IMAGE_TARGET_DPI = 150
+IMAGE_DEFAULT_DPI = 72
+IMAGE_JPEG_QUALITY = 85
+HASH_READ_BLOCK_SIZE = 1024 * 1024
+IMAGE_FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png"}
+
+
+@dataclass(frozen=True)
+class ImageProcessingOptions:
+    target_dpi: int = IMAGE_TARGET_DPI
+    # when not set, width is taken from the source image size and dpi
+    display_width_inches: Optional[float] = None
+    output_format: str = "JPEG"
+    jpeg_quality: int = IMAGE_JPEG_QUALITY
+
+
+def compute_processed_image_key(
+    image_path: FilePath, options: ImageProcessingOptions
+) -> str:
+    image_hash = hashlib.sha256(repr(astuple(options)).encode())
+    with open(image_path, "rb") as f:
+        while block := f.read(HASH_READ_BLOCK_SIZE):
+            image_hash.update(block)
+    return image_hash.hexdigest()
+
+
+def process_image(
+    image_path: FilePath, output_path: FilePath, options: ImageProcessingOptions
+) -> None:
+    with Image.open(image_path) as image:
+        source_dpi = image.info.get("dpi", (IMAGE_DEFAULT_DPI,))[0] or IMAGE_DEFAULT_DPI
+        source_width_inches = image.width / source_dpi
+        display_width_inches = options.display_width_inches or source_width_inches
+        max_width = round(display_width_inches * options.target_dpi)
+        if (
+            image.width <= max_width
+            and image.format == options.output_format
+            and math.isclose(source_width_inches, display_width_inches, rel_tol=1e-3)
+        ):
+            # nothing to downsample and the source already prints at the
+            # display width, re-encoding would only lose quality
+            shutil.copyfile(image_path, output_path)
+            return
+        if image.width > max_width:
+            height = max(round(image.height * max_width / image.width), 1)
+            image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+        # dpi is stored, so the image keeps its printed size in the document
+        output_dpi = image.width / display_width_inches
+        save_options: Dict = {"dpi": (output_dpi, output_dpi), "optimize": True}
+        if options.output_format == "JPEG":
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            # a jpeg that only gets a new dpi keeps its quantization tables,
+            # so it is not degraded and does not grow
+            save_options["quality"] = (
+                "keep" if image.format == "JPEG" else options.jpeg_quality
+            )
+        image.save(output_path, format=options.output_format, **save_options)
+
+
+def prepare_image(
+    image_path: FilePath,
+    cache_dir: DirectoryPath,
+    options: ImageProcessingOptions = ImageProcessingOptions(),
+) -> str:
+    """Returns path of the processed image, images are processed once per content"""
+    image_key = compute_processed_image_key(image_path, options)
+    extension = IMAGE_FORMAT_EXTENSIONS.get(options.output_format, "")
+    processed_path = os.path.join(cache_dir, f"{image_key}{extension}")
+    if os.path.isfile(processed_path):
+        return processed_path
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{processed_path}.{os.getpid()}.tmp"
+    process_image(image_path, temp_path, options)
+    os.replace(temp_path, processed_path)
+    return processed_path
+
+
+def prepare_images(
+    image_paths: List[FilePath],
+    cache_dir: DirectoryPath,
+    options: ImageProcessingOptions = ImageProcessingOptions(),
+    workers_num: int = os.cpu_count() or 1,
+) -> List[str]:
+    unique_paths = list(dict.fromkeys(image_paths))
+    if workers_num <= 1 or len(unique_paths) <= 1:
+        processed_paths = [
+            prepare_image(image_path, cache_dir, options) for image_path in unique_paths
+        ]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers_num
+        ) as executor:
+            processed_paths = list(
+                executor.map(
+                    prepare_image,
+                    unique_paths,
+                    [cache_dir] * len(unique_paths),
+                    [options] * len(unique_paths),
+                )
+            )
+    path_to_processed = dict(zip(unique_paths, processed_paths))
+    return [path_to_processed[image_path] for image_path in image_paths]
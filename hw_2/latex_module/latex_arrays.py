@@ -0,0 +1,136 @@
+from typing import Dict, List, Optional, Sequence, TextIO
+import io
+import numpy as np
+from latex_module.latex_utils import (
+    LATEX_LINE_BREAK,
+    LATEX_ROW_SEPARATOR,
+    create_centered_cells_header,
+)
+
+LONGTABLE_MIN_ROWS = 500
+# cells are joined with this separator, so a whole column is escaped
+# with a single str.translate call
+BULK_CELLS_SEPARATOR = "\x00"
+LATEX_SPECIAL_CHARACTERS_TABLE = str.maketrans(
+    {
+        "\\": "\\textbackslash{}",
+        "&": "\\&",
+        "%": "\\%",
+        "$": "\\$",
+        "#": "\\#",
+        "_": "\\_",
+        "{": "\\{",
+        "}": "\\}",
+        "~": "\\textasciitilde{}",
+        "^": "\\textasciicircum{}",
+    }
+)
+
+
+def escape_latex_cells(cells: List[str]) -> List[str]:
+    joined_cells = BULK_CELLS_SEPARATOR.join(cells)
+    if joined_cells.count(BULK_CELLS_SEPARATOR) != len(cells) - 1:
+        return [cell.translate(LATEX_SPECIAL_CHARACTERS_TABLE) for cell in cells]
+    return joined_cells.translate(LATEX_SPECIAL_CHARACTERS_TABLE).split(
+        BULK_CELLS_SEPARATOR
+    )
+
+
+def format_numeric_cells(values: List, format_spec: str) -> List[str]:
+    if not values:
+        return []
+    # one str.format call formats the whole column
+    column_template = ("{:" + format_spec + "}" + BULK_CELLS_SEPARATOR) * len(values)
+    return column_template.format(*values).split(BULK_CELLS_SEPARATOR)[:-1]
+
+
+def format_column(column: np.ndarray, format_spec: Optional[str]) -> List[str]:
+    if (
+        np.issubdtype(column.dtype, np.number)
+        and not np.issubdtype(column.dtype, np.complexfloating)
+        and format_spec is None
+    ):
+        # default formatting of numbers gives no latex special characters
+        return format_numeric_cells(column.tolist(), "")
+    # user format specs may add them, like "%" of ".1%"
+    column_values = column.tolist()
+    if format_spec is not None:
+        return escape_latex_cells(format_numeric_cells(column_values, format_spec))
+    return escape_latex_cells(list(map(str, column_values)))
+
+
+def get_longtable_include_instruction() -> str:
+    return "\\usepackage{longtable}"
+
+
+def write_latex_table_from_columns(
+    columns: List[List[str]],
+    sink: TextIO,
+    column_names: Optional[List[str]] = None,
+    longtable_min_rows: int = LONGTABLE_MIN_ROWS,
+) -> None:
+    if not columns or not columns[0]:
+        raise ValueError("Table should contain at least one row")
+    rows_num = len(columns[0])
+    if not all(len(column) == rows_num for column in columns):
+        raise ValueError("All columns should have the same amount of values")
+    # long tables have to be split between pages, which tabular cannot do
+    environment = "longtable" if rows_num >= longtable_min_rows else "tabular"
+    sink.write(
+        f"\\begin{{{environment}}}" + create_centered_cells_header(len(columns)) + "\n"
+    )
+    if column_names is not None:
+        header_row = LATEX_ROW_SEPARATOR.join(escape_latex_cells(column_names))
+        sink.write(f"{header_row}{LATEX_LINE_BREAK}\n\\hline\n")
+        if environment == "longtable":
+            sink.write("\\endhead\n")
+    sink.write(
+        f"{LATEX_LINE_BREAK}\n".join(map(LATEX_ROW_SEPARATOR.join, zip(*columns)))
+    )
+    sink.write(f"\n\\end{{{environment}}}\n")
+
+
+def render_latex_table_from_array(
+    data: np.ndarray,
+    column_formats: Optional[Sequence[Optional[str]]] = None,
+    column_names: Optional[List[str]] = None,
+    longtable_min_rows: int = LONGTABLE_MIN_ROWS,
+) -> str:
+    data = np.asarray(data)
+    if data.ndim != 2:
+        raise ValueError(f"Expected 2D array, got array with shape {data.shape}")
+    column_formats = column_formats or [None] * data.shape[1]
+    if len(column_formats) != data.shape[1]:
+        raise ValueError("Format should be provided for every column")
+    columns = [
+        format_column(data[:, column_index], column_format)
+        for column_index, column_format in enumerate(column_formats)
+    ]
+    latex_repr = io.StringIO()
+    write_latex_table_from_columns(
+        columns, latex_repr, column_names, longtable_min_rows
+    )
+    return latex_repr.getvalue()
+
+
+def render_latex_table_from_dataframe(
+    data_frame,
+    column_formats: Optional[Dict[str, str]] = None,
+    include_header: bool = True,
+    longtable_min_rows: int = LONGTABLE_MIN_ROWS,
+) -> str:
+    # pandas is not imported, any object with columns and per-column numpy
+    # conversion works here
+    column_formats = column_formats or {}
+    columns = [
+        format_column(
+            data_frame[column_name].to_numpy(), column_formats.get(column_name)
+        )
+        for column_name in data_frame.columns
+    ]
+    column_names = list(map(str, data_frame.columns)) if include_header else None
+    latex_repr = io.StringIO()
+    write_latex_table_from_columns(
+        columns, latex_repr, column_names, longtable_min_rows
+    )
+    return latex_repr.getvalue()
@@ -1,4 +1,5 @@
-from typing import List, Callable
+from typing import Callable, Iterable, List, TextIO
+import io
 from pydantic import FilePath
 
 # \begin{tabular}{ c c c }
@@ -9,6 +10,8 @@ from pydantic import FilePath
 
 
 LATEX_ROW_SEPARATOR = " & "
+LATEX_LINE_BREAK = " \\\\"
+LATEX_TABLE_WRITE_CHUNK_ROWS = 4096
 
 
 def form_latex_row(row_data: List[str]) -> str:
@@ -20,28 +23,50 @@ def create_centered_cells_header(columns_number: int) -> str:
 
 
 def validate_table_data_format(table_data: List[List[str]]) -> None:
-    rows_lengths = [len(row) for row in table_data]
-    if not all([row_len == rows_lengths[0] for row_len in rows_lengths]):
+    if not all(len(row) == len(table_data[0]) for row in table_data):
         raise ValueError("All rows should have the same amount of values")
 
 
+def write_latex_table(
+    table_rows: Iterable[List[str]],
+    sink: TextIO,
+    header_generator: Callable[[int], str] = create_centered_cells_header,
+    row_generator: Callable[[List[str]], str] = form_latex_row,
+    chunk_rows: int = LATEX_TABLE_WRITE_CHUNK_ROWS,
+) -> None:
+    # rows are validated while streaming, so on a bad row the part of the
+    # table before it is already written to the sink
+    rows_iterator = iter(table_rows)
+    try:
+        previous_row = next(rows_iterator)
+    except StopIteration:
+        raise ValueError("Table should contain at least one row")
+    columns_num = len(previous_row)
+    sink.write("\\begin{tabular}" + header_generator(columns_num) + "\n")
+    chunk: List[str] = []
+    # last row has no line break, so every row is written once the next one is known
+    for row in rows_iterator:
+        if len(row) != columns_num:
+            raise ValueError("All rows should have the same amount of values")
+        chunk.append(f"{row_generator(previous_row)}{LATEX_LINE_BREAK}\n")
+        previous_row = row
+        if len(chunk) >= chunk_rows:
+            sink.write("".join(chunk))
+            chunk.clear()
+    chunk.append(f"{row_generator(previous_row)}\n")
+    chunk.append("\\end{tabular}\n")
+    sink.write("".join(chunk))
+
+
 def create_latex_table(
     table_data: List[List[str]],
     header_generator: Callable[[int], str] = create_centered_cells_header,
     row_generator: Callable[[List[str]], str] = form_latex_row,
 ) -> str:
     validate_table_data_format(table_data)
-    columns_num = len(table_data[0])
-    rows_num = len(table_data)
-    latex_table_header = header_generator(columns_num)
-    latex_repr = "\\begin{tabular}" + latex_table_header + "\n"
-    for row_index, row in enumerate(table_data):
-        latex_row = row_generator(row)
-        if row_index != rows_num - 1:
-            latex_row += f" \\\\"
-        latex_repr += f"{latex_row}\n"
-    latex_repr += "\\end{tabular}\n"
-    return latex_repr
+    latex_repr = io.StringIO()
+    write_latex_table(table_data, latex_repr, header_generator, row_generator)
+    return latex_repr.getvalue()
 
 
 def latex_img_with_includegraphix(image_path: FilePath) -> str:
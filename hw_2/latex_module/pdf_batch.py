@@ -0,0 +1,182 @@
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+import concurrent.futures
+from dataclasses import dataclass
+from pydantic import FilePath, DirectoryPath
+from typing import Dict, List, Optional
+from latex_module.pdf_cache import PDFBuildCache
+
+COMPILE_TIMEOUT_SECONDS = 120
+LOG_EXCERPT_LINES = 20
+LATEX_ENGINE = "pdflatex"
+
+
+@dataclass
+class CompileResult:
+    tex_path: str
+    pdf_path: Optional[str]
+    elapsed_seconds: float
+    error: str = ""
+    log_excerpt: str = ""
+    from_cache: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return self.pdf_path is not None
+
+
+def extract_log_excerpt(log_path: FilePath, lines_num: int = LOG_EXCERPT_LINES) -> str:
+    try:
+        with open(log_path, errors="replace") as f:
+            log_lines = f.read().splitlines()
+    except OSError:
+        return ""
+    # latex errors start with "!", the lines after them point to the source
+    for line_index, line in enumerate(log_lines):
+        if line.startswith("!"):
+            return "\n".join(log_lines[line_index : line_index + lines_num])
+    return "\n".join(log_lines[-lines_num:])
+
+
+def get_output_pdf_paths(
+    tex_paths: List[FilePath], output_dir: Optional[DirectoryPath] = None
+) -> List[str]:
+    tex_paths = [os.path.abspath(tex_path) for tex_path in tex_paths]
+    tex_dirs = [os.path.dirname(tex_path) for tex_path in tex_paths]
+    # directories of the sources are kept under output_dir, so a/doc.tex
+    # and b/doc.tex do not end up in the same doc.pdf
+    common_dir = os.path.commonpath(tex_dirs) if tex_paths else ""
+    return [
+        os.path.join(
+            (
+                os.path.join(output_dir, os.path.relpath(tex_dir, common_dir))
+                if output_dir
+                else tex_dir
+            ),
+            os.path.splitext(os.path.basename(tex_path))[0] + ".pdf",
+        )
+        for tex_path, tex_dir in zip(tex_paths, tex_dirs)
+    ]
+
+
+def compile_tex_in_isolation(
+    tex_path: FilePath,
+    pdf_path: Optional[FilePath] = None,
+    engine: str = LATEX_ENGINE,
+    timeout: float = COMPILE_TIMEOUT_SECONDS,
+) -> CompileResult:
+    start_time = time.perf_counter()
+    tex_path = os.path.abspath(tex_path)
+    pdf_path = pdf_path or get_output_pdf_paths([tex_path])[0]
+    tex_name = os.path.splitext(os.path.basename(tex_path))[0]
+    # every job writes aux and log files into its own directory, so parallel
+    # jobs compiling documents with the same name do not mix them up
+    with tempfile.TemporaryDirectory(prefix="tex_job_") as job_dir:
+        command = [
+            engine,
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            f"-output-directory={job_dir}",
+            tex_path,
+        ]
+        error = ""
+        try:
+            completed = subprocess.run(
+                command,
+                cwd=os.path.dirname(tex_path),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=timeout,
+            )
+            if completed.returncode != 0:
+                error = f"{engine} exited with {completed.returncode}"
+        except subprocess.TimeoutExpired:
+            error = f"{engine} did not finish in {timeout} s"
+        except OSError as os_error:
+            error = f"{engine} could not be started: {os_error}"
+        job_pdf_path = os.path.join(job_dir, f"{tex_name}.pdf")
+        if not error and not os.path.isfile(job_pdf_path):
+            error = f"{engine} did not produce {tex_name}.pdf"
+        if error:
+            return CompileResult(
+                tex_path=tex_path,
+                pdf_path=None,
+                elapsed_seconds=time.perf_counter() - start_time,
+                error=error,
+                log_excerpt=extract_log_excerpt(
+                    os.path.join(job_dir, f"{tex_name}.log")
+                ),
+            )
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        shutil.move(job_pdf_path, pdf_path)
+    return CompileResult(
+        tex_path=tex_path,
+        pdf_path=pdf_path,
+        elapsed_seconds=time.perf_counter() - start_time,
+    )
+
+
+def compile_tex_batch(
+    tex_paths: List[FilePath],
+    output_dir: Optional[DirectoryPath] = None,
+    workers_num: int = os.cpu_count() or 1,
+    build_cache: Optional[PDFBuildCache] = None,
+    engine: str = LATEX_ENGINE,
+    timeout: float = COMPILE_TIMEOUT_SECONDS,
+) -> List[CompileResult]:
+    """Compiles documents on a bounded process pool, results keep jobs order"""
+    results: Dict[int, CompileResult] = {}
+    build_keys: Dict[int, str] = {}
+    jobs_to_compile: List[int] = []
+    pdf_paths = get_output_pdf_paths(tex_paths, output_dir)
+    for job_index, (tex_path, pdf_path) in enumerate(zip(tex_paths, pdf_paths)):
+        if build_cache is None:
+            jobs_to_compile.append(job_index)
+            continue
+        start_time = time.perf_counter()
+        try:
+            build_keys[job_index] = build_cache.compute_build_key(tex_path)
+        except OSError as os_error:
+            # an unreadable source fails its own job only, as without cache
+            results[job_index] = CompileResult(
+                tex_path=os.path.abspath(tex_path),
+                pdf_path=None,
+                elapsed_seconds=time.perf_counter() - start_time,
+                error=f"{tex_path} could not be read: {os_error}",
+            )
+            continue
+        cached_pdf_path = build_cache.get(build_keys[job_index])
+        if cached_pdf_path is None:
+            jobs_to_compile.append(job_index)
+            continue
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        shutil.copyfile(cached_pdf_path, pdf_path)
+        results[job_index] = CompileResult(
+            tex_path=os.path.abspath(tex_path),
+            pdf_path=pdf_path,
+            elapsed_seconds=time.perf_counter() - start_time,
+            from_cache=True,
+        )
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers_num) as executor:
+        future_to_job_index = {
+            executor.submit(
+                compile_tex_in_isolation,
+                tex_paths[job_index],
+                pdf_paths[job_index],
+                engine,
+                timeout,
+            ): job_index
+            for job_index in jobs_to_compile
+        }
+        for future in concurrent.futures.as_completed(future_to_job_index):
+            job_index = future_to_job_index[future]
+            result = future.result()
+            results[job_index] = result
+            if build_cache is not None and result.succeeded:
+                build_cache.put(build_keys[job_index], result.pdf_path)
+    return [results[job_index] for job_index in range(len(tex_paths))]
@@ -0,0 +1,156 @@
+import os
+import re
+import shutil
+import hashlib
+import subprocess
+import functools
+from pydantic import FilePath, DirectoryPath
+from typing import Callable, Dict, List, Optional, Tuple
+
+PDF_CACHE_MAX_SIZE_BYTES = 512 * 1024 * 1024
+PDF_CACHE_MAX_ENTRIES = 256
+HASH_READ_BLOCK_SIZE = 1024 * 1024
+GRAPHICS_EXTENSIONS = [".pdf", ".png", ".jpg", ".jpeg", ".eps"]
+INCLUDEGRAPHICS_PATTERN = re.compile(r"\\includegraphics(?:\[[^\]]*\])?\{([^}]*)\}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_engine_version(engine: str = "pdflatex") -> str:
+    try:
+        version_output = subprocess.run(
+            [engine, "--version"], capture_output=True, text=True, check=False
+        ).stdout
+    except OSError:
+        return ""
+    return version_output.splitlines()[0] if version_output else ""
+
+
+def find_referenced_assets(tex_content: str, tex_dir: DirectoryPath) -> List[str]:
+    assets: List[str] = []
+    for asset_name in INCLUDEGRAPHICS_PATTERN.findall(tex_content):
+        asset_path = os.path.join(tex_dir, asset_name.strip())
+        # graphicx allows to omit the extension of included file
+        candidates = [asset_path] + [
+            asset_path + extension for extension in GRAPHICS_EXTENSIONS
+        ]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                assets.append(candidate)
+                break
+        else:
+            assets.append(asset_path)
+    return assets
+
+
+class FileHasher:
+    """Hashes file contents, digests are reused while size and mtime are the same"""
+
+    def __init__(self) -> None:
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+
+    def get_digest(self, file_path: FilePath) -> str:
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return "missing"
+        cached = self._digests.get(file_path)
+        if cached is not None and cached[:2] == (
+            file_stat.st_size,
+            file_stat.st_mtime_ns,
+        ):
+            return cached[2]
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while block := f.read(HASH_READ_BLOCK_SIZE):
+                file_hash.update(block)
+        digest = file_hash.hexdigest()
+        self._digests[file_path] = (file_stat.st_size, file_stat.st_mtime_ns, digest)
+        return digest
+
+
+class PDFBuildCache:
+    def __init__(
+        self,
+        cache_dir: DirectoryPath,
+        max_size_bytes: int = PDF_CACHE_MAX_SIZE_BYTES,
+        max_entries: int = PDF_CACHE_MAX_ENTRIES,
+        engine: str = "pdflatex",
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._max_size_bytes = max_size_bytes
+        self._max_entries = max_entries
+        self._engine = engine
+        self._file_hasher = FileHasher()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def compute_build_key(self, tex_path: FilePath) -> str:
+        with open(tex_path, "rb") as f:
+            tex_content = f.read()
+        build_hash = hashlib.sha256()
+        build_hash.update(get_engine_version(self._engine).encode())
+        build_hash.update(b"\0")
+        build_hash.update(tex_content)
+        assets = find_referenced_assets(
+            tex_content.decode(errors="replace"), os.path.dirname(tex_path)
+        )
+        for asset_path in assets:
+            build_hash.update(b"\0")
+            build_hash.update(asset_path.encode())
+            build_hash.update(self._file_hasher.get_digest(asset_path).encode())
+        return build_hash.hexdigest()
+
+    def _get_entry_path(self, build_key: str) -> str:
+        return os.path.join(self._cache_dir, f"{build_key}.pdf")
+
+    def get(self, build_key: str) -> Optional[str]:
+        entry_path = self._get_entry_path(build_key)
+        try:
+            # access time is kept in mtime, it orders entries for eviction
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return entry_path
+
+    def put(self, build_key: str, pdf_path: FilePath) -> str:
+        entry_path = self._get_entry_path(build_key)
+        temp_entry_path = f"{entry_path}.{os.getpid()}.tmp"
+        shutil.copyfile(pdf_path, temp_entry_path)
+        os.replace(temp_entry_path, entry_path)
+        self.evict()
+        return entry_path
+
+    def evict(self) -> None:
+        entries: List[Tuple[float, int, str]] = []
+        for entry in os.scandir(self._cache_dir):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                entry_stat = entry.stat()
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+        entries.sort()
+        total_size = sum(entry_size for _, entry_size, _ in entries)
+        while entries and (
+            total_size > self._max_size_bytes or len(entries) > self._max_entries
+        ):
+            _, entry_size, entry_path = entries.pop(0)
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total_size -= entry_size
+
+    def build(
+        self, tex_path: FilePath, compile_function: Callable[[FilePath], FilePath]
+    ) -> str:
+        """Returns path of the pdf built from tex_path, compiles only on cache miss"""
+        build_key = self.compute_build_key(tex_path)
+        output_pdf_path = os.path.splitext(tex_path)[0] + ".pdf"
+        cached_pdf_path = self.get(build_key)
+        if cached_pdf_path is not None:
+            self.hits += 1
+            shutil.copyfile(cached_pdf_path, output_pdf_path)
+            return output_pdf_path
+        self.misses += 1
+        compiled_pdf_path = compile_function(tex_path)
+        self.put(build_key, compiled_pdf_path)
+        return compiled_pdf_path
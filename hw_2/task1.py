@@ -1,12 +1,10 @@
 import os
+from typing import Optional
 from pydantic import FilePath
 from pdflatex import PDFLaTeX
-from latex_module.latex_utils import (
-    create_latex_table,
-    get_graphix_include_instruction,
-    latex_img_with_includegraphix,
-    wrap_latex_content_as_document,
-)
+from latex_module.document_builder import LatexDocumentBuilder
+from latex_module.pdf_cache import PDFBuildCache
+from latex_module.image_assets import ImageProcessingOptions, prepare_image
 
 
 EXAMPLE_TABLE = [["A", "B"], ["C", "D"]]
@@ -16,37 +14,44 @@ os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 TABLE_TEX_OUTPUT = os.path.join(ARTIFACTS_DIR, "table.tex")
 TABLE_AND_IMG_TEX_OUTPUT = os.path.join(ARTIFACTS_DIR, "table_and_image.tex")
 TEX_IMAGE_PATH = os.path.join(SCRIPT_DIR, "assets", "real.jpg")
+PDF_CACHE_DIR = os.path.join(ARTIFACTS_DIR, ".pdf_cache")
+IMAGE_CACHE_DIR = os.path.join(ARTIFACTS_DIR, ".image_cache")
+BUILD_CACHE = PDFBuildCache(PDF_CACHE_DIR)
+# text width of the default article class, 345pt
+DOCUMENT_TEXT_WIDTH_INCHES = 345 / 72.27
+IMAGE_OPTIONS = ImageProcessingOptions(display_width_inches=DOCUMENT_TEXT_WIDTH_INCHES)
 
 
 def generate_latex_document_with_table() -> None:
-    latex_table = create_latex_table(EXAMPLE_TABLE)
-    latex_include = get_graphix_include_instruction()
-    latex_content = "\n".join([latex_table])
-    latex_document = wrap_latex_content_as_document(latex_content)
-    doc_class_statement = "\\documentclass{article}\n"
-    latex_document = "\n".join([doc_class_statement, latex_include, latex_document])
-    with open(TABLE_TEX_OUTPUT, "w") as f:
-        f.write(latex_document)
+    document_builder = LatexDocumentBuilder()
+    document_builder.add_table(EXAMPLE_TABLE)
+    document_builder.write(TABLE_TEX_OUTPUT)
 
 
 def generate_latex_document_with_table_and_img() -> None:
-    latex_table = create_latex_table(EXAMPLE_TABLE)
-    latex_include = get_graphix_include_instruction()
-    latex_img = latex_img_with_includegraphix(TEX_IMAGE_PATH)
-    latex_content = "\n".join([latex_img, latex_table])
-    latex_document = wrap_latex_content_as_document(latex_content)
-    doc_class_statement = "\\documentclass{article}\n"
-    latex_document = "\n".join([doc_class_statement, latex_include, latex_document])
-    with open(TABLE_AND_IMG_TEX_OUTPUT, "w") as f:
-        f.write(latex_document)
-
-
-def generate_pdf_from_tex(tex_path: FilePath) -> None:
-    if not os.path.exists(tex_path):
-        raise ValueError(f"Missing file {tex_path}")
+    document_builder = LatexDocumentBuilder()
+    document_builder.add_image(
+        prepare_image(TEX_IMAGE_PATH, IMAGE_CACHE_DIR, IMAGE_OPTIONS)
+    )
+    document_builder.add_table(EXAMPLE_TABLE)
+    document_builder.write(TABLE_AND_IMG_TEX_OUTPUT)
+
+
+def compile_tex_to_pdf(tex_path: FilePath) -> str:
     pdfl = PDFLaTeX.from_texfile(tex_path)
     pdfl.set_output_directory(os.path.dirname(tex_path))
     pdf = pdfl.create_pdf(keep_pdf_file=True, keep_log_file=False)
+    return os.path.splitext(tex_path)[0] + ".pdf"
+
+
+def generate_pdf_from_tex(
+    tex_path: FilePath, build_cache: Optional[PDFBuildCache] = BUILD_CACHE
+) -> str:
+    if not os.path.exists(tex_path):
+        raise ValueError(f"Missing file {tex_path}")
+    if build_cache is None:
+        return compile_tex_to_pdf(tex_path)
+    return build_cache.build(tex_path, compile_tex_to_pdf)
 
 
 def table_tex_pipeline() -> None:
@@ -0,0 +1,81 @@
+import os
+import time
+import random
+import click
+from typing import Callable, Dict, List, Tuple
+from matmul_kernels import MATMUL_TILE_SIZE, blocked_matmul
+
+SCRIPT_DIR = os.path.dirname(__file__)
+ARTIFACT_FILE = os.path.join(SCRIPT_DIR, "artifacts", "matmul_benchmark.txt")
+RANDOM_SEED = 0
+
+
+def naive_matmul(
+    left: List[List[float]], right: List[List[float]]
+) -> List[List[float]]:
+    # the loop MatrixTask1.__matmul__ used before the blocked kernel
+    output_matrix_data = [[0 for _ in range(len(right[0]))] for _ in range(len(left))]
+    for out_col_index in range(len(left)):
+        for out_row_index in range(len(right[0])):
+            output_element = 0
+            for i in range(len(right)):
+                output_element += left[out_col_index][i] * right[i][out_row_index]
+            output_matrix_data[out_col_index][out_row_index] = output_element
+    return output_matrix_data
+
+
+def generate_random_matrix(size: int) -> List[List[float]]:
+    return [[random.random() for _ in range(size)] for _ in range(size)]
+
+
+def get_avg_time_of_function_run(f: Callable, exp_num: int, *args, **kwargs) -> float:
+    time_measurements: List[float] = []
+    for _ in range(exp_num):
+        t1 = time.perf_counter()
+        f(*args, **kwargs)
+        t2 = time.perf_counter()
+        time_measurements.append(t2 - t1)
+    return sum(time_measurements) / len(time_measurements)
+
+
+@click.command()
+@click.option("--sizes", type=int, multiple=True, default=[50, 100, 200])
+@click.option("--tile_size", type=int, default=MATMUL_TILE_SIZE)
+@click.option("--workers", type=int, default=os.cpu_count() or 1)
+@click.option("--runs", type=int, default=3)
+def run(sizes: Tuple[int, ...], tile_size: int, workers: int, runs: int):
+    random.seed(RANDOM_SEED)
+    strategies: Dict[str, Callable] = {
+        "naive": naive_matmul,
+        "blocked": lambda left, right: blocked_matmul(left, right, tile_size),
+        f"blocked, {workers} processes": lambda left, right: blocked_matmul(
+            left, right, tile_size, workers_num=workers
+        ),
+    }
+    table_lines = [
+        "| size | " + " | ".join(f"{name} (s)" for name in strategies) + " | speedup |",
+        "|---|" + "---|" * (len(strategies) + 1),
+    ]
+    for size in sizes:
+        left, right = generate_random_matrix(size), generate_random_matrix(size)
+        timings = [
+            get_avg_time_of_function_run(strategy, runs, left, right)
+            for strategy in strategies.values()
+        ]
+        speedup = timings[0] / min(timings[1:])
+        table_lines.append(
+            f"| {size} | "
+            + " | ".join(f"{timing:.4f}" for timing in timings)
+            + f" | {speedup:.1f}x |"
+        )
+        print(table_lines[-1])
+    os.makedirs(os.path.dirname(ARTIFACT_FILE), exist_ok=True)
+    with open(ARTIFACT_FILE, "w") as f:
+        f.write(f"CPU CORES NUM = {os.cpu_count()}\n")
+        f.write(f"TILE SIZE = {tile_size}\n")
+        f.write(f"RESULT TABLE:\n")
+        f.write("\n".join(table_lines) + "\n")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,270 @@
+import numbers
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple, Union
+import numpy as np
+from pydantic import FilePath
+from task2 import FileWriterMixin, MatrixTask2, wrap_matrix_result
+
+# element-wise chains are evaluated in row blocks of about this many
+# elements, so temporaries of a block stay in cache
+FUSED_BLOCK_ELEMENTS = 32 * 1024
+
+Operand = Union["LazyMatrix", numbers.Number]
+
+
+class LazyMatrix(np.lib.mixins.NDArrayOperatorsMixin, FileWriterMixin):
+    """Node of an expression graph over MatrixTask2 values.
+
+    Operators only record the ufunc and its operands, the graph is evaluated
+    on compute(), printing or writing. Structurally equal subexpressions
+    share one key, so they are evaluated once.
+    """
+
+    _HANDLED_TYPES = (np.ndarray, numbers.Number, MatrixTask2)
+
+    def __init__(
+        self,
+        data: Union[MatrixTask2, np.ndarray, None] = None,
+        ufunc: Optional[np.ufunc] = None,
+        inputs: Tuple[Operand, ...] = (),
+        kwargs: Optional[dict] = None,
+    ) -> None:
+        self._ufunc = ufunc
+        self._inputs = inputs
+        self._kwargs = kwargs or {}
+        self._value: Optional[MatrixTask2] = None
+        if ufunc is None:
+            self._array = np.asarray(data)
+            if self._array.ndim != 2:
+                raise ValueError(f"Only 2d matrices are supported, got {data!r}")
+            self._shape = self._array.shape
+            # leaves are the same when they wrap the same array
+            self._key: Hashable = ("leaf", id(self._array))
+        else:
+            self._array = None
+            self._shape = infer_shape(ufunc, inputs)
+            self._key = (
+                ufunc.__name__,
+                tuple(get_operand_key(x) for x in inputs),
+                tuple(sorted(self._kwargs.items())),
+            )
+
+    @property
+    def key(self) -> Hashable:
+        return self._key
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._shape
+
+    @property
+    def height(self) -> int:
+        return self._shape[0]
+
+    @property
+    def width(self) -> int:
+        return self._shape[1]
+
+    @property
+    def is_leaf(self) -> bool:
+        return self._ufunc is None
+
+    @property
+    def is_elementwise(self) -> bool:
+        # generalized ufuncs like matmul have a signature, plain ones do not
+        return self._ufunc is not None and self._ufunc.signature is None
+
+    def lazy_inputs(self) -> List["LazyMatrix"]:
+        return [x for x in self._inputs if isinstance(x, LazyMatrix)]
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        for x in inputs + kwargs.get("out", ()):
+            if not isinstance(x, self._HANDLED_TYPES + (LazyMatrix,)):
+                return NotImplemented
+        inputs = tuple(
+            x if isinstance(x, (LazyMatrix, numbers.Number)) else LazyMatrix(x)
+            for x in inputs
+        )
+        out = kwargs.get("out", ())
+        if any(isinstance(x, LazyMatrix) for x in out):
+            raise TypeError(
+                f"{type(self).__name__} can not be written in place, "
+                "use m = m + 1 instead of m += 1"
+            )
+        if out:
+            # results go into the given MatrixTask2 or ndarray outputs
+            inputs = tuple(
+                x.compute() if isinstance(x, LazyMatrix) else x for x in inputs
+            )
+            return getattr(ufunc, method)(*inputs, **kwargs)
+        if method != "__call__" or ufunc.nout != 1 or not is_hashable(kwargs):
+            # reductions and multiple outputs are computed right away
+            inputs = tuple(
+                x.compute().data if isinstance(x, LazyMatrix) else x for x in inputs
+            )
+            return wrap_matrix_result(getattr(ufunc, method)(*inputs, **kwargs))
+        return LazyMatrix(ufunc=ufunc, inputs=inputs, kwargs=kwargs)
+
+    def compute(self) -> MatrixTask2:
+        if self._value is None:
+            self._value = MatrixTask2(LazyEvaluator(self).evaluate(self))
+        return self._value
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.compute().__array__(dtype, copy)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self.compute().data
+
+    def write_to_binary_file(self, file_path: FilePath, name: str = "matrix") -> None:
+        self.compute().write_to_binary_file(file_path, name)
+
+    def __str__(self) -> str:
+        return str(self.compute())
+
+    def __repr__(self):
+        operation = "leaf" if self.is_leaf else self._ufunc.__name__
+        return "%s(%s, %dx%d)" % (type(self).__name__, operation, *self._shape)
+
+
+def is_hashable(kwargs: dict) -> bool:
+    try:
+        hash(tuple(kwargs.items()))
+    except TypeError:
+        return False
+    return True
+
+
+def get_operand_key(operand: Operand) -> Hashable:
+    if isinstance(operand, LazyMatrix):
+        return operand.key
+    # 1 and 1.0 are equal as dict keys, but give different dtypes
+    return ("scalar", type(operand).__name__, operand)
+
+
+def infer_shape(ufunc: np.ufunc, inputs: Tuple[Operand, ...]) -> Tuple[int, int]:
+    shapes = [x.shape for x in inputs if isinstance(x, LazyMatrix)]
+    if ufunc is np.matmul:
+        (height, inner_size), (right_height, width) = shapes
+        if inner_size != right_height:
+            raise ValueError(
+                f"Unsupported shapes for @, ({height}x{inner_size}) and ({right_height}x{width})"
+            )
+        return height, width
+    try:
+        return np.broadcast_shapes(*shapes)
+    except ValueError:
+        raise ValueError(
+            f"Unsupported shapes for {ufunc.__name__}, "
+            + " and ".join(f"({height}x{width})" for height, width in shapes)
+        )
+
+
+class LazyEvaluator:
+    """Evaluates an expression graph.
+
+    Element-wise nodes are grouped into fused chains, every chain is computed
+    block by block in one pass over its inputs. Leaves, matmul results and
+    element-wise nodes used by several chains are materialized once.
+    """
+
+    def __init__(self, root: LazyMatrix) -> None:
+        self._nodes: Dict[Hashable, LazyMatrix] = {}
+        self._collect_nodes(root)
+        self._chain_roots = self._find_chain_roots(root)
+        self._values: Dict[Hashable, np.ndarray] = {}
+
+    def _collect_nodes(self, root: LazyMatrix) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.key not in self._nodes:
+                self._nodes[node.key] = node
+                stack.extend(node.lazy_inputs())
+
+    def _find_chain_roots(self, root: LazyMatrix) -> Set[Hashable]:
+        chain_roots = {root.key} | {
+            child.key
+            for node in self._nodes.values()
+            if not node.is_elementwise
+            for child in node.lazy_inputs()
+            if child.is_elementwise
+        }
+        while True:
+            reached_from: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+            for chain_root in chain_roots:
+                stack = [self._nodes[chain_root]]
+                while stack:
+                    for child in stack.pop().lazy_inputs():
+                        if child.is_elementwise and child.key not in chain_roots:
+                            if chain_root not in reached_from[child.key]:
+                                reached_from[child.key].add(chain_root)
+                                stack.append(child)
+            # a node shared by several chains gets its own chain, so it is
+            # computed once instead of once per chain
+            shared = {key for key, roots in reached_from.items() if len(roots) > 1}
+            if not shared:
+                return chain_roots
+            chain_roots |= shared
+
+    def evaluate(self, node: LazyMatrix) -> np.ndarray:
+        node = self._nodes.get(node.key, node)
+        if node.key in self._values:
+            return self._values[node.key]
+        if node.is_leaf:
+            value = node._array
+        elif node.is_elementwise:
+            value = self._evaluate_fused_chain(node)
+        else:
+            value = node._ufunc(
+                *(self._evaluate_operand(x) for x in node._inputs), **node._kwargs
+            )
+        self._values[node.key] = value
+        return value
+
+    def _evaluate_operand(self, operand: Operand):
+        return self.evaluate(operand) if isinstance(operand, LazyMatrix) else operand
+
+    def _evaluate_fused_chain(self, chain_root: LazyMatrix) -> np.ndarray:
+        height, width = chain_root.shape
+        rows_per_block = max(FUSED_BLOCK_ELEMENTS // max(width, 1), 1)
+        output: Optional[np.ndarray] = None
+        for row_start in range(0, max(height, 1), rows_per_block):
+            row_end = min(row_start + rows_per_block, height)
+            block = self._evaluate_block(chain_root, chain_root, row_start, row_end, {})
+            if output is None:
+                output = np.empty(chain_root.shape, dtype=block.dtype)
+            output[row_start:row_end] = block
+        return output
+
+    def _evaluate_block(
+        self,
+        operand: Operand,
+        chain_root: LazyMatrix,
+        row_start: int,
+        row_end: int,
+        block_values: Dict[Hashable, np.ndarray],
+    ):
+        if not isinstance(operand, LazyMatrix):
+            return operand
+        node = self._nodes.get(operand.key, operand)
+        if node is not chain_root and (
+            not node.is_elementwise or node.key in self._chain_roots
+        ):
+            # inputs of the chain are materialized, only their rows are used
+            value = self.evaluate(node)
+            if value.shape[0] == chain_root.height:
+                return value[row_start:row_end]
+            return value
+        if node.key not in block_values:
+            block_values[node.key] = node._ufunc(
+                *(
+                    self._evaluate_block(
+                        x, chain_root, row_start, row_end, block_values
+                    )
+                    for x in node._inputs
+                ),
+                **node._kwargs,
+            )
+        return block_values[node.key]
@@ -0,0 +1,103 @@
+import numbers
+import operator
+import concurrent.futures
+from array import array
+from typing import Dict, List, Sequence
+
+MATMUL_TILE_SIZE = 64
+PARALLEL_MATMUL_MIN_ROWS = 128
+INT_TYPECODE = "q"
+FLOAT_TYPECODE = "d"
+# right operand is sent to every worker once, in the pool initializer
+WORKER_STATE: Dict[str, List[array]] = {}
+
+
+def get_typecode(data: Sequence[Sequence[float]]) -> str:
+    # integer matrices stay integer, so results print the same way
+    is_integer = all(
+        isinstance(value, numbers.Integral) for row in data for value in row
+    )
+    return INT_TYPECODE if is_integer else FLOAT_TYPECODE
+
+
+def to_row_buffers(data: Sequence[Sequence[float]], typecode: str) -> List[array]:
+    return [array(typecode, row) for row in data]
+
+
+def transpose_to_column_buffers(
+    data: Sequence[Sequence[float]], typecode: str
+) -> List[array]:
+    # columns of the right operand become contiguous buffers, so a dot
+    # product reads two sequential buffers instead of jumping between rows
+    return [array(typecode, column) for column in zip(*data)]
+
+
+def multiply_row_block(
+    left_rows: List[array],
+    right_columns: List[array],
+    tile_size: int = MATMUL_TILE_SIZE,
+) -> List[List[float]]:
+    output_rows: List[List[float]] = [[0] * len(right_columns) for _ in left_rows]
+    inner_size = len(left_rows[0]) if left_rows else 0
+    for column_start in range(0, len(right_columns), tile_size):
+        column_end = min(column_start + tile_size, len(right_columns))
+        for inner_start in range(0, inner_size, tile_size):
+            inner_end = min(inner_start + tile_size, inner_size)
+            # tile of the right operand is sliced once and reused for every row
+            columns_tile = [
+                (column_index, right_columns[column_index][inner_start:inner_end])
+                for column_index in range(column_start, column_end)
+            ]
+            for left_row, output_row in zip(left_rows, output_rows):
+                row_tile = left_row[inner_start:inner_end]
+                for column_index, column_tile in columns_tile:
+                    # map and sum run the dot product loop in C
+                    output_row[column_index] += sum(
+                        map(operator.mul, row_tile, column_tile)
+                    )
+    return output_rows
+
+
+def init_matmul_worker(right_columns: List[array]) -> None:
+    WORKER_STATE["right_columns"] = right_columns
+
+
+def multiply_row_block_in_worker(
+    left_rows: List[array], tile_size: int
+) -> List[List[float]]:
+    return multiply_row_block(left_rows, WORKER_STATE["right_columns"], tile_size)
+
+
+def blocked_matmul(
+    left: Sequence[Sequence[float]],
+    right: Sequence[Sequence[float]],
+    tile_size: int = MATMUL_TILE_SIZE,
+    workers_num: int = 1,
+) -> List[List[float]]:
+    if len(left[0]) != len(right):
+        raise ValueError(
+            f"Unsupported shapes for @, ({len(left)}x{len(left[0])}) and ({len(right)}x{len(right[0])})"
+        )
+    typecode = (
+        INT_TYPECODE
+        if get_typecode(left) == get_typecode(right) == INT_TYPECODE
+        else FLOAT_TYPECODE
+    )
+    left_rows = to_row_buffers(left, typecode)
+    right_columns = transpose_to_column_buffers(right, typecode)
+    if workers_num <= 1 or len(left_rows) < PARALLEL_MATMUL_MIN_ROWS:
+        return multiply_row_block(left_rows, right_columns, tile_size)
+    row_block_size = -(-len(left_rows) // workers_num)
+    row_blocks = [
+        left_rows[block_start : block_start + row_block_size]
+        for block_start in range(0, len(left_rows), row_block_size)
+    ]
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers_num,
+        initializer=init_matmul_worker,
+        initargs=(right_columns,),
+    ) as executor:
+        output_blocks = executor.map(
+            multiply_row_block_in_worker, row_blocks, [tile_size] * len(row_blocks)
+        )
+        return [row for output_block in output_blocks for row in output_block]
@@ -0,0 +1,189 @@
+import struct
+from dataclasses import dataclass
+from pydantic import FilePath
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+MATRIX_FILE_MAGIC = b"MTRX"
+MATRIX_FILE_VERSION = 1
+# magic, version, matrices number
+MATRIX_FILE_HEADER = struct.Struct("<4sII")
+# dtype string, height, width, data offset, name length,
+# the utf-8 name follows the header
+MATRIX_ENTRY_HEADER = struct.Struct("<8sQQQI")
+# matrix data starts at aligned offsets, so memory maps of it are aligned too
+MATRIX_DATA_ALIGNMENT = 64
+SUPPORTED_DTYPE_KINDS = "biuf"
+WRITE_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def align_offset(offset: int) -> int:
+    return -(-offset // MATRIX_DATA_ALIGNMENT) * MATRIX_DATA_ALIGNMENT
+
+
+@dataclass
+class MatrixEntry:
+    name: str
+    dtype: np.dtype
+    shape: Tuple[int, int]
+    offset: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.shape[0] * self.shape[1] * self.dtype.itemsize
+
+
+def read_matrix_entries(file_path: FilePath) -> List[MatrixEntry]:
+    entries: List[MatrixEntry] = []
+    with open(file_path, "rb") as f:
+        magic, version, matrices_num = MATRIX_FILE_HEADER.unpack(
+            f.read(MATRIX_FILE_HEADER.size)
+        )
+        if magic != MATRIX_FILE_MAGIC or version != MATRIX_FILE_VERSION:
+            raise ValueError(
+                f"{file_path} is not a matrix file of version {MATRIX_FILE_VERSION}"
+            )
+        for _ in range(matrices_num):
+            dtype_str, height, width, offset, name_length = MATRIX_ENTRY_HEADER.unpack(
+                f.read(MATRIX_ENTRY_HEADER.size)
+            )
+            name = f.read(name_length).decode("utf-8")
+            entry = MatrixEntry(
+                name,
+                np.dtype(dtype_str.rstrip(b"\0").decode()),
+                (height, width),
+                offset,
+            )
+            entries.append(entry)
+            # headers of the next matrix are right after this matrix data
+            f.seek(entry.offset + entry.nbytes)
+    return entries
+
+
+class MatrixFileWriter:
+    """Writes several matrices into one container file.
+
+    Every matrix gets a header with its name, dtype and shape, followed by
+    its elements in C order, so a reader can memory-map them in place.
+    """
+
+    def __init__(self, file_path: FilePath) -> None:
+        self._file_path = file_path
+        self._file = None
+        self._names: List[str] = []
+
+    def __enter__(self) -> "MatrixFileWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        self._file = open(self._file_path, "wb")
+        self._write_file_header()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_file_header(self) -> None:
+        # matrices number is rewritten after every matrix, so a partially
+        # written file still lists only complete matrices
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(
+            MATRIX_FILE_HEADER.pack(
+                MATRIX_FILE_MAGIC, MATRIX_FILE_VERSION, len(self._names)
+            )
+        )
+        self._file.seek(max(position, MATRIX_FILE_HEADER.size))
+
+    def _write_entry_header(
+        self, name: str, dtype: np.dtype, shape: Tuple[int, int]
+    ) -> MatrixEntry:
+        if dtype.kind not in SUPPORTED_DTYPE_KINDS:
+            raise ValueError(f"Unsupported matrix dtype {dtype}")
+        if len(shape) != 2:
+            raise ValueError(f"Only 2d matrices are supported, got shape {shape}")
+        if name in self._names:
+            raise ValueError(f"Matrix {name} is already written")
+        encoded_name = name.encode("utf-8")
+        entry_start = self._file.tell()
+        entry = MatrixEntry(
+            name,
+            dtype,
+            shape,
+            align_offset(entry_start + MATRIX_ENTRY_HEADER.size + len(encoded_name)),
+        )
+        self._file.write(
+            MATRIX_ENTRY_HEADER.pack(
+                dtype.str.encode(), shape[0], shape[1], entry.offset, len(encoded_name)
+            )
+        )
+        self._file.write(encoded_name)
+        self._file.write(b"\0" * (entry.offset - self._file.tell()))
+        return entry
+
+    def add_matrix(self, name: str, data) -> MatrixEntry:
+        # MatrixTask2 and memmaps are exported without copying
+        array = np.asarray(data)
+        entry = self._write_entry_header(name, array.dtype, array.shape)
+        row_nbytes = array.shape[1] * array.itemsize
+        rows_per_chunk = max(WRITE_CHUNK_BYTES // max(row_nbytes, 1), 1)
+        for row_start in range(0, array.shape[0], rows_per_chunk):
+            chunk = np.ascontiguousarray(array[row_start : row_start + rows_per_chunk])
+            self._file.write(memoryview(chunk).cast("B"))
+        self._names.append(name)
+        self._write_file_header()
+        return entry
+
+    def create_matrix(
+        self, name: str, shape: Tuple[int, int], dtype=np.float64
+    ) -> np.memmap:
+        """Reserves space for a matrix and returns a writable memory map of it,
+        for results that do not fit into RAM"""
+        entry = self._write_entry_header(name, np.dtype(dtype), shape)
+        self._file.truncate(entry.offset + entry.nbytes)
+        self._file.seek(entry.offset + entry.nbytes)
+        self._names.append(name)
+        self._write_file_header()
+        self._file.flush()
+        return map_matrix_entry(self._file_path, entry, mode="r+")
+
+
+def map_matrix_entry(
+    file_path: FilePath, entry: MatrixEntry, mode: str = "r"
+) -> np.memmap:
+    return np.memmap(
+        file_path, dtype=entry.dtype, mode=mode, offset=entry.offset, shape=entry.shape
+    )
+
+
+def find_matrix_entry(file_path: FilePath, name: Optional[str] = None) -> MatrixEntry:
+    for entry in read_matrix_entries(file_path):
+        if name is None or entry.name == name:
+            return entry
+    raise KeyError(f"No matrix {name} in {file_path}")
+
+
+def open_matrix(
+    file_path: FilePath, name: Optional[str] = None, mode: str = "r"
+) -> np.memmap:
+    """Memory-maps one matrix of a container, the first one by default.
+    Slicing the result reads only the touched pages."""
+    return map_matrix_entry(file_path, find_matrix_entry(file_path, name), mode)
+
+
+def open_matrices(file_path: FilePath, mode: str = "r") -> Dict[str, np.memmap]:
+    return {
+        entry.name: map_matrix_entry(file_path, entry, mode)
+        for entry in read_matrix_entries(file_path)
+    }
+
+
+def save_matrices(file_path: FilePath, named_matrices: Iterable[Tuple[str, object]]):
+    with MatrixFileWriter(file_path) as writer:
+        for name, matrix in named_matrices:
+            writer.add_matrix(name, matrix)
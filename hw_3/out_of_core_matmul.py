@@ -0,0 +1,197 @@
+import os
+import math
+import click
+import concurrent.futures
+from typing import Dict, Iterator, Optional, Tuple
+from pydantic import FilePath
+import numpy as np
+from matrix_io import (
+    MatrixEntry,
+    MatrixFileWriter,
+    find_matrix_entry,
+    map_matrix_entry,
+)
+
+OUT_OF_CORE_MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+# every worker holds a left tile, a right tile, the output accumulator and
+# the temporary product of two tiles
+TILES_PER_WORKER = 4
+MIN_TILE_SIZE = 16
+# memory maps are opened once per worker, in the pool initializer
+WORKER_STATE: Dict[str, np.memmap] = {}
+
+
+def choose_tile_size(
+    shape: Tuple[int, int, int],
+    itemsize: int,
+    memory_budget_bytes: int,
+    workers_num: int,
+) -> int:
+    tile_budget_bytes = memory_budget_bytes // (workers_num * TILES_PER_WORKER)
+    tile_size = max(math.isqrt(tile_budget_bytes // itemsize), MIN_TILE_SIZE)
+    return min(tile_size, max(shape))
+
+
+def iter_output_tiles(
+    height: int, width: int, tile_size: int
+) -> Iterator[Tuple[int, int, int, int]]:
+    for row_start in range(0, height, tile_size):
+        for column_start in range(0, width, tile_size):
+            yield (
+                row_start,
+                min(row_start + tile_size, height),
+                column_start,
+                min(column_start + tile_size, width),
+            )
+
+
+def multiply_output_tile(
+    left: np.memmap,
+    right: np.memmap,
+    result: np.memmap,
+    output_tile: Tuple[int, int, int, int],
+    tile_size: int,
+) -> None:
+    row_start, row_end, column_start, column_end = output_tile
+    accumulator = np.zeros(
+        (row_end - row_start, column_end - column_start), dtype=result.dtype
+    )
+    for inner_start in range(0, left.shape[1], tile_size):
+        inner_end = min(inner_start + tile_size, left.shape[1])
+        # slicing a memory map reads only the pages of this tile
+        accumulator += (
+            left[row_start:row_end, inner_start:inner_end]
+            @ right[inner_start:inner_end, column_start:column_end]
+        )
+    # output tiles do not overlap, so workers write into the shared
+    # result map without locks, writes of MAP_SHARED maps are visible
+    # through the page cache without flushing every tile
+    result[row_start:row_end, column_start:column_end] = accumulator
+
+
+def init_out_of_core_worker(
+    left_source: Tuple[FilePath, MatrixEntry],
+    right_source: Tuple[FilePath, MatrixEntry],
+    result_source: Tuple[FilePath, MatrixEntry],
+) -> None:
+    WORKER_STATE["left"] = map_matrix_entry(*left_source)
+    WORKER_STATE["right"] = map_matrix_entry(*right_source)
+    WORKER_STATE["result"] = map_matrix_entry(*result_source, mode="r+")
+
+
+def multiply_output_tile_in_worker(
+    output_tile: Tuple[int, int, int, int], tile_size: int
+) -> None:
+    multiply_output_tile(
+        WORKER_STATE["left"],
+        WORKER_STATE["right"],
+        WORKER_STATE["result"],
+        output_tile,
+        tile_size,
+    )
+
+
+def out_of_core_matmul(
+    left_path: FilePath,
+    right_path: FilePath,
+    result_path: FilePath,
+    left_name: Optional[str] = None,
+    right_name: Optional[str] = None,
+    result_name: str = "result",
+    memory_budget_bytes: int = OUT_OF_CORE_MEMORY_BUDGET_BYTES,
+    workers_num: int = 1,
+) -> MatrixEntry:
+    """Multiplies matrices stored in matrix files tile by tile, so only a few
+    tiles per worker are in memory at once, and writes the product into
+    a new matrix file"""
+    if os.path.abspath(result_path) in map(os.path.abspath, (left_path, right_path)):
+        raise ValueError("Result can not be written into an operand file")
+    left_entry = find_matrix_entry(left_path, left_name)
+    right_entry = find_matrix_entry(right_path, right_name)
+    (height, inner_size), (right_height, width) = left_entry.shape, right_entry.shape
+    if inner_size != right_height:
+        raise ValueError(
+            f"Unsupported shapes for @, ({height}x{inner_size}) and ({right_height}x{width})"
+        )
+    result_dtype = np.result_type(left_entry.dtype, right_entry.dtype)
+    tile_size = choose_tile_size(
+        (height, inner_size, width),
+        result_dtype.itemsize,
+        memory_budget_bytes,
+        workers_num,
+    )
+    with MatrixFileWriter(result_path) as writer:
+        result = writer.create_matrix(result_name, (height, width), result_dtype)
+    result_entry = find_matrix_entry(result_path, result_name)
+    output_tiles = list(iter_output_tiles(height, width, tile_size))
+
+    if workers_num <= 1 or len(output_tiles) == 1:
+        left = map_matrix_entry(left_path, left_entry)
+        right = map_matrix_entry(right_path, right_entry)
+        for output_tile in output_tiles:
+            multiply_output_tile(left, right, result, output_tile, tile_size)
+        result.flush()
+        return result_entry
+
+    del result
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers_num,
+        initializer=init_out_of_core_worker,
+        initargs=(
+            (left_path, left_entry),
+            (right_path, right_entry),
+            (result_path, result_entry),
+        ),
+    ) as executor:
+        # list() propagates exceptions raised in workers
+        list(
+            executor.map(
+                multiply_output_tile_in_worker,
+                output_tiles,
+                [tile_size] * len(output_tiles),
+            )
+        )
+    return result_entry
+
+
+@click.command()
+@click.argument("left_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("right_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("result_path", type=click.Path(dir_okay=False))
+@click.option("--left_name", type=str, default=None)
+@click.option("--right_name", type=str, default=None)
+@click.option("--result_name", type=str, default="result")
+@click.option(
+    "--memory_budget_mb",
+    type=int,
+    default=OUT_OF_CORE_MEMORY_BUDGET_BYTES // (1024 * 1024),
+)
+@click.option("--workers", type=int, default=os.cpu_count() or 1)
+def run(
+    left_path: str,
+    right_path: str,
+    result_path: str,
+    left_name: Optional[str],
+    right_name: Optional[str],
+    result_name: str,
+    memory_budget_mb: int,
+    workers: int,
+):
+    result_entry = out_of_core_matmul(
+        left_path,
+        right_path,
+        result_path,
+        left_name=left_name,
+        right_name=right_name,
+        result_name=result_name,
+        memory_budget_bytes=memory_budget_mb * 1024 * 1024,
+        workers_num=workers,
+    )
+    print(
+        f"{result_name} {result_entry.shape[0]}x{result_entry.shape[1]} "
+        f"{result_entry.dtype} is written to {result_path}"
+    )
+
+
+if __name__ == "__main__":
+    run()
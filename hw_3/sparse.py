@@ -0,0 +1,237 @@
+from array import array
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+from task1 import BACKEND_AUTO, MatrixTask1
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INDEX_TYPECODE = "q"
+# sparse matmul cost grows with the product of operands densities, above
+# this value dense MatrixTask1 kernels win, much earlier when numpy is there
+DENSE_MATMUL_MIN_DENSITY_PRODUCT = 0.02 if np is not None else 0.5
+
+
+class SparseMatrix:
+    """Matrix in CSR format, row i owns indices[indptr[i]:indptr[i + 1]]"""
+
+    # numpy operators of MatrixTask2 and ndarray defer to the reflected
+    # operators of this class instead of treating it as an object array
+    __array_ufunc__ = None
+
+    def __init__(
+        self,
+        height: int,
+        width: int,
+        indptr: Sequence[int],
+        indices: Sequence[int],
+        values: Sequence[float],
+    ) -> None:
+        if len(indptr) != height + 1 or len(indices) != len(values):
+            raise ValueError("Inconsistent CSR arrays")
+        self._height, self._width = height, width
+        self._indptr = array(INDEX_TYPECODE, indptr)
+        self._indices = array(INDEX_TYPECODE, indices)
+        self._values = list(values)
+
+    @classmethod
+    def from_rows(
+        cls, height: int, width: int, rows: Sequence[Dict[int, float]]
+    ) -> "SparseMatrix":
+        # zeros are dropped, so cancellations do not leave explicit entries
+        indptr, indices, values = [0], [], []
+        for row in rows:
+            for column_index in sorted(row):
+                if row[column_index]:
+                    indices.append(column_index)
+                    values.append(row[column_index])
+            indptr.append(len(indices))
+        return cls(height, width, indptr, indices, values)
+
+    @classmethod
+    def from_coo(
+        cls,
+        height: int,
+        width: int,
+        rows: Sequence[int],
+        columns: Sequence[int],
+        values: Sequence[float],
+    ) -> "SparseMatrix":
+        # duplicated coordinates are summed up
+        csr_rows: List[Dict[int, float]] = [{} for _ in range(height)]
+        for row_index, column_index, value in zip(rows, columns, values):
+            if not (0 <= row_index < height and 0 <= column_index < width):
+                raise ValueError(
+                    f"Element ({row_index}, {column_index}) is out of ({height}x{width}) matrix"
+                )
+            row = csr_rows[row_index]
+            row[column_index] = row.get(column_index, 0) + value
+        return cls.from_rows(height, width, csr_rows)
+
+    @classmethod
+    def from_dense(cls, data: Sequence[Sequence[float]]) -> "SparseMatrix":
+        data = data.tolist() if hasattr(data, "tolist") else data
+        rows = [
+            {column_index: value for column_index, value in enumerate(row) if value}
+            for row in data
+        ]
+        return cls.from_rows(len(data), len(data[0]), rows)
+
+    @classmethod
+    def from_matrix(cls, matrix) -> "SparseMatrix":
+        # MatrixTask1 and MatrixTask2 both keep their elements in _data
+        return cls.from_dense(matrix._data)
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def nnz(self) -> int:
+        return len(self._values)
+
+    @property
+    def density(self) -> float:
+        return self.nnz / (self._height * self._width)
+
+    def iter_row(self, row_index: int) -> Iterator[Tuple[int, float]]:
+        row_start, row_end = self._indptr[row_index], self._indptr[row_index + 1]
+        return zip(self._indices[row_start:row_end], self._values[row_start:row_end])
+
+    def to_coo(self) -> Tuple[List[int], List[int], List[float]]:
+        rows = [
+            row_index
+            for row_index in range(self._height)
+            for _ in range(self._indptr[row_index + 1] - self._indptr[row_index])
+        ]
+        return rows, self._indices.tolist(), list(self._values)
+
+    def to_dense(self) -> List[List[float]]:
+        output_matrix_data = [[0] * self._width for _ in range(self._height)]
+        for row_index, output_row in enumerate(output_matrix_data):
+            for column_index, value in self.iter_row(row_index):
+                output_row[column_index] = value
+        return output_matrix_data
+
+    def to_matrix_task1(self, backend: str = BACKEND_AUTO) -> MatrixTask1:
+        return MatrixTask1(self.to_dense(), backend=backend)
+
+    def to_matrix_task2(self):
+        # task2 needs numpy, so it is imported only when it is asked for
+        from task2 import MatrixTask2
+
+        return MatrixTask2(self.to_dense())
+
+    def _should_use_dense_matmul(self, other: "SparseMatrix") -> bool:
+        return self.density * other.density >= DENSE_MATMUL_MIN_DENSITY_PRODUCT
+
+    @staticmethod
+    def _as_sparse(other: Union["SparseMatrix", MatrixTask1]) -> "SparseMatrix":
+        if isinstance(other, SparseMatrix):
+            return other
+        if hasattr(other, "_data"):
+            return SparseMatrix.from_matrix(other)
+        return SparseMatrix.from_dense(other)
+
+    def _check_shapes_for_elementwise_ops(
+        self, mat1: "SparseMatrix", mat2: "SparseMatrix"
+    ) -> bool:
+        return mat1._height == mat2._height and mat1._width == mat2._width
+
+    def _check_shapes_for_matmul(
+        self, mat1: "SparseMatrix", mat2: "SparseMatrix"
+    ) -> bool:
+        return mat1._width == mat2._height
+
+    def __add__(self, other: "SparseMatrix") -> "SparseMatrix":
+        other = self._as_sparse(other)
+        if not self._check_shapes_for_elementwise_ops(self, other):
+            raise ValueError(
+                f"Unsupported shapes for +, ({self._height}x{self._width}) and ({other._height}x{other._width})"
+            )
+        # merging rows is linear in the number of non-zeros, it beats
+        # dense addition even for half filled matrices
+        rows: List[Dict[int, float]] = []
+        for row_index in range(self._height):
+            row = dict(self.iter_row(row_index))
+            for column_index, value in other.iter_row(row_index):
+                row[column_index] = row.get(column_index, 0) + value
+            rows.append(row)
+        return SparseMatrix.from_rows(self._height, self._width, rows)
+
+    def __mul__(self, other: "SparseMatrix") -> "SparseMatrix":
+        other = self._as_sparse(other)
+        if not self._check_shapes_for_elementwise_ops(self, other):
+            raise ValueError(
+                f"Unsupported shapes for *, ({self._height}x{self._width}) and ({other._height}x{other._width})"
+            )
+        # only positions that are non-zero in both operands survive,
+        # so the sparse kernel is never worse than the dense one
+        rows: List[Dict[int, float]] = []
+        for row_index in range(self._height):
+            row = dict(self.iter_row(row_index))
+            rows.append(
+                {
+                    column_index: row[column_index] * value
+                    for column_index, value in other.iter_row(row_index)
+                    if column_index in row
+                }
+            )
+        return SparseMatrix.from_rows(self._height, self._width, rows)
+
+    def __matmul__(self, other: "SparseMatrix") -> "SparseMatrix":
+        other = self._as_sparse(other)
+        if not self._check_shapes_for_matmul(self, other):
+            raise ValueError(
+                f"Unsupported shapes for @, ({self._height}x{self._width}) and ({other._height}x{other._width})"
+            )
+        if self._should_use_dense_matmul(other):
+            return SparseMatrix.from_matrix(
+                self.to_matrix_task1() @ other.to_matrix_task1()
+            )
+        # row by row product: non-zero a[i][k] scales row k of the right operand
+        other_rows = [
+            list(other.iter_row(row_index)) for row_index in range(other._height)
+        ]
+        rows: List[Dict[int, float]] = []
+        for row_index in range(self._height):
+            row: Dict[int, float] = {}
+            for inner_index, left_value in self.iter_row(row_index):
+                for column_index, right_value in other_rows[inner_index]:
+                    row[column_index] = (
+                        row.get(column_index, 0) + left_value * right_value
+                    )
+            rows.append(row)
+        return SparseMatrix.from_rows(self._height, other._width, rows)
+
+    def __radd__(self, other: MatrixTask1) -> "SparseMatrix":
+        return self._as_sparse(other) + self
+
+    def __rmul__(self, other: MatrixTask1) -> "SparseMatrix":
+        return self._as_sparse(other) * self
+
+    def __rmatmul__(self, other: MatrixTask1) -> "SparseMatrix":
+        return self._as_sparse(other) @ self
+
+    def __str__(self) -> str:
+        row_formatter = lambda row: " ".join(map(lambda value: f"{value:4d}", row))
+        pretty_print_data = "\n".join(row_formatter(row) for row in self.to_dense())
+        matrix_pretty_print = (
+            f"Matrix {self._height}x{self._width}\n----\n"
+            + pretty_print_data
+            + "\n----"
+        )
+        return matrix_pretty_print
+
+    def __repr__(self):
+        return "%s(%d, %d, nnz=%d)" % (
+            type(self).__name__,
+            self._height,
+            self._width,
+            self.nnz,
+        )
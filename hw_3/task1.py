@@ -1,17 +1,54 @@
 import os
-from typing import List
+from typing import List, Union
 from pydantic import FilePath
-import numpy as np
+from matmul_kernels import blocked_matmul
+
+try:
+    import numpy as np
+except ImportError:
+    # pure python backend works without numpy
+    np = None
 
 
 RANDOM_SEED = 0
 TEST_MATRIX_SHAPE = (10, 10)
+BACKEND_AUTO = "auto"
+BACKEND_NUMPY = "numpy"
+BACKEND_PYTHON = "python"
+# below this size numpy call overhead is bigger than the python loops cost
+NUMPY_BACKEND_MIN_ELEMENTS = 64
 
 
 class MatrixTask1:
-    def __init__(self, data: List[List[float]]) -> None:
-        self._data = data
+    def __init__(
+        self, data: Union[List[List[float]], "np.ndarray"], backend: str = BACKEND_AUTO
+    ) -> None:
         self._height, self._width = len(data), len(data[0])
+        if backend == BACKEND_AUTO:
+            backend = (
+                BACKEND_NUMPY
+                if np is not None
+                and self._height * self._width >= NUMPY_BACKEND_MIN_ELEMENTS
+                else BACKEND_PYTHON
+            )
+        if backend == BACKEND_NUMPY:
+            if np is None:
+                raise ValueError(
+                    "numpy backend is not available, numpy is not installed"
+                )
+            self._data = np.ascontiguousarray(data)
+        elif backend == BACKEND_PYTHON:
+            self._data = data.tolist() if hasattr(data, "tolist") else data
+        else:
+            raise ValueError(f"Unknown backend {backend}")
+        self._backend = backend
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    def _should_use_numpy(self, other: "MatrixTask1") -> bool:
+        return BACKEND_NUMPY in (self._backend, other._backend)
 
     def _check_shapes_for_elementwise_ops(
         self, mat1: "MatrixTask1", mat2: "MatrixTask1"
@@ -24,10 +61,18 @@ class MatrixTask1:
         return mat1._width == mat2._height
 
     def __add__(self, other: "MatrixTask1") -> "MatrixTask1":
+        if not isinstance(other, MatrixTask1):
+            # lets other matrix types handle it in reflected operators
+            return NotImplemented
         if not self._check_shapes_for_elementwise_ops(self, other):
             raise ValueError(
                 f"Unsupported shapes for +, ({self._height}x{self._width}) and ({other._height}x{other._width})"
             )
+        if self._should_use_numpy(other):
+            return MatrixTask1(
+                np.add(np.asarray(self._data), np.asarray(other._data)),
+                backend=BACKEND_NUMPY,
+            )
         output_matrix_data = [
             [0 for _ in range(self._width)] for _ in range(self._height)
         ]
@@ -37,10 +82,18 @@ class MatrixTask1:
         return MatrixTask1(output_matrix_data)
 
     def __mul__(self, other: "MatrixTask1") -> "MatrixTask1":
+        if not isinstance(other, MatrixTask1):
+            # lets other matrix types handle it in reflected operators
+            return NotImplemented
         if not self._check_shapes_for_elementwise_ops(self, other):
             raise ValueError(
                 f"Unsupported shapes for *, ({self._height}x{self._width}) and ({other._height}x{other._width})"
             )
+        if self._should_use_numpy(other):
+            return MatrixTask1(
+                np.multiply(np.asarray(self._data), np.asarray(other._data)),
+                backend=BACKEND_NUMPY,
+            )
         output_matrix_data = [
             [0 for _ in range(self._width)] for _ in range(self._height)
         ]
@@ -51,23 +104,22 @@ class MatrixTask1:
         return MatrixTask1(output_matrix_data)
 
     def __matmul__(self, other: "MatrixTask1") -> "MatrixTask1":
+        if not isinstance(other, MatrixTask1):
+            # lets other matrix types handle it in reflected operators
+            return NotImplemented
         if not self._check_shapes_for_matmul(self, other):
             raise ValueError(
                 f"Unsupported shapes for @, ({self._height}x{self._width}) and ({other._height}x{other._width})"
             )
-        output_matrix_data = [
-            [0 for _ in range(other._width)] for _ in range(self._height)
-        ]
-        for out_col_index in range(self._height):
-            for out_row_index in range(other._width):
-                output_element = 0
-                for i in range(self._width):
-                    output_element += (
-                        self._data[out_col_index][i] * other._data[i][out_row_index]
-                    )
-                output_matrix_data[out_col_index][out_row_index] = output_element
-
-        return MatrixTask1(output_matrix_data)
+        if self._should_use_numpy(other):
+            # float matrices go to BLAS, integer ones to numpy own kernel
+            return MatrixTask1(
+                np.matmul(np.asarray(self._data), np.asarray(other._data)),
+                backend=BACKEND_NUMPY,
+            )
+        return MatrixTask1(
+            blocked_matmul(self._data, other._data), backend=BACKEND_PYTHON
+        )
 
     def __str__(self) -> str:
         row_formatter = lambda row: " ".join(map(lambda value: f"{value:4d}", row))
@@ -1,11 +1,16 @@
 import os
-from typing import List
+import numbers
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
 import numpy as np
 from io import TextIOWrapper
 from pydantic import FilePath
+from matrix_io import open_matrix, save_matrices
 
 RANDOM_SEED = 0
 TEST_MATRIX_SHAPE = (10, 10)
+MATMUL_CACHE_MAX_SIZE_BYTES = 64 * 1024 * 1024
 
 
 class PrettyPrintMixin:
@@ -47,6 +52,9 @@ class FileWriterMixin:
     def write_to_opened_file(self, f: TextIOWrapper) -> None:
         f.write(f"{self}\n")
 
+    def write_to_binary_file(self, file_path: FilePath, name: str = "matrix") -> None:
+        save_matrices(file_path, [(name, self._data)])
+
 
 class MatrixTask2(
     np.lib.mixins.NDArrayOperatorsMixin,
@@ -54,42 +62,214 @@ class MatrixTask2(
     PropertiesMixin,
     FileWriterMixin,
 ):
-    def __init__(self, data: List[List[float]]):
-        self._data = data
-        self._height, self._width = len(data), len(data[0])
+    def __init__(self, data: Union[List[List[float]], np.ndarray]):
+        # ndarray input is wrapped without copying
+        self._data = np.asarray(data)
+        self._height, self._width = self._data.shape
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = np.asarray(value)
+        self._height, self._width = self._data.shape
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if copy:
+            return np.array(self._data, dtype=dtype, copy=True)
+        return self._data if dtype is None else self._data.astype(dtype, copy=False)
 
     # One might also consider adding the built-in list type to this
     # list, to support operations like np.add(array_like, list)
+    _HANDLED_TYPES = (np.ndarray, numbers.Number)
 
     def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
         out = kwargs.get("out", ())
         for x in inputs + out:
-            if not isinstance(x, MatrixTask2):
+            if not isinstance(x, self._HANDLED_TYPES + (MatrixTask2,)):
                 return NotImplemented
 
         # Defer to the implementation of the ufunc on unwrapped values.
-        x: MatrixTask2
-        inputs = tuple(x._data for x in inputs)
+        inputs = tuple(x._data if isinstance(x, MatrixTask2) else x for x in inputs)
         if out:
             kwargs["out"] = tuple(
                 x._data if isinstance(x, MatrixTask2) else x for x in out
             )
         result = getattr(ufunc, method)(*inputs, **kwargs)
 
-        if type(result) is tuple:
-            # multiple return values
-            return tuple(type(self)(x) for x in result)
-        elif method == "at":
+        if method == "at":
             # no return value
             return None
-        else:
-            # one return value
-            return type(self)(result)
+        if out:
+            # results are already written into the given outputs
+            return out[0] if len(out) == 1 else out
+        return wrap_matrix_result(result, type(self))
+
+    @classmethod
+    def from_binary_file(
+        cls, file_path: FilePath, name: Optional[str] = None
+    ) -> "MatrixTask2":
+        # the matrix stays on disk, only the touched pages are read
+        return cls(open_matrix(file_path, name))
+
+    def lazy(self):
+        """Wraps the matrix into a LazyMatrix, so operators on it build an
+        expression graph that is evaluated on compute()"""
+        # lazy module is built on top of this one
+        from lazy import LazyMatrix
+
+        return LazyMatrix(self)
 
     def __repr__(self):
         return "%s(%r)" % (type(self).__name__, self._data)
 
 
+def wrap_matrix_result(result, matrix_type: type = MatrixTask2):
+    # reductions give vectors and scalars, only matrices are wrapped
+    if type(result) is tuple:
+        # multiple return values
+        return tuple(wrap_matrix_result(x, matrix_type) for x in result)
+    return matrix_type(result) if np.ndim(result) == 2 else result
+
+
+class ImmutableMatrixTask2(MatrixTask2):
+    """Read-only matrix, its content hash is computed once and reused"""
+
+    def __init__(self, data: Union[List[List[float]], np.ndarray]):
+        # the copy makes sure nobody else holds a writable view of the data
+        super().__init__(np.array(data, copy=True))
+        self._data.setflags(write=False)
+        self._hash: Optional[int] = None
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._height, self._width
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash((self.shape, self._data.dtype.str, self._data.tobytes()))
+        return self._hash
+
+    def has_same_content(self, other: "ImmutableMatrixTask2") -> bool:
+        return self.shape == other.shape and np.array_equal(self._data, other._data)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if (
+            ufunc is np.matmul
+            and method == "__call__"
+            and not kwargs
+            and len(inputs) == 2
+            and all(isinstance(x, ImmutableMatrixTask2) for x in inputs)
+        ):
+            left, right = inputs
+            return MATMUL_CACHE.matmul(left, right)
+        return super().__array_ufunc__(ufunc, method, *inputs, **kwargs)
+
+
+@dataclass
+class MatmulCacheEntry:
+    left: ImmutableMatrixTask2
+    right: ImmutableMatrixTask2
+    result: ImmutableMatrixTask2
+    size_bytes: int
+
+
+class MatmulCache:
+    """LRU cache of matrix products keyed on the operands hashes and shapes.
+
+    Keys may collide, so a hit is returned only if operands are equal
+    to the cached ones element by element.
+    """
+
+    def __init__(self, max_size_bytes: int = MATMUL_CACHE_MAX_SIZE_BYTES) -> None:
+        self._max_size_bytes = max_size_bytes
+        self._entries: OrderedDict[Tuple, MatmulCacheEntry] = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _get_key(left: ImmutableMatrixTask2, right: ImmutableMatrixTask2) -> Tuple:
+        return hash(left), left.shape, hash(right), right.shape
+
+    def get(
+        self, left: ImmutableMatrixTask2, right: ImmutableMatrixTask2
+    ) -> Optional[ImmutableMatrixTask2]:
+        key = self._get_key(left, right)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not (
+            entry.left.has_same_content(left) and entry.right.has_same_content(right)
+        ):
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.result
+
+    def put(
+        self,
+        left: ImmutableMatrixTask2,
+        right: ImmutableMatrixTask2,
+        result: ImmutableMatrixTask2,
+    ) -> None:
+        key = self._get_key(left, right)
+        # cached operands are kept alive by the cache, so they count too
+        size_bytes = sum(matrix._data.nbytes for matrix in (left, right, result))
+        if size_bytes > self._max_size_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = MatmulCacheEntry(left, right, result, size_bytes)
+        self._size_bytes += size_bytes
+        self.evict()
+
+    def evict(self) -> None:
+        while self._size_bytes > self._max_size_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_bytes -= entry.size_bytes
+
+    def matmul(
+        self, left: ImmutableMatrixTask2, right: ImmutableMatrixTask2
+    ) -> ImmutableMatrixTask2:
+        result = self.get(left, right)
+        if result is None:
+            result = ImmutableMatrixTask2(np.matmul(left._data, right._data))
+            self.put(left, right, result)
+        return result
+
+
+MATMUL_CACHE = MatmulCache()
+
+
 def write_matrices_to_file(
     matrices: List[MatrixTask2], matrices_titles: List[str], file_name: FilePath
 ):
@@ -99,10 +279,14 @@ def write_matrices_to_file(
             f.write(f"{matrix}\n")
 
 
+def write_matrices_to_binary_file(
+    matrices: List[MatrixTask2], matrices_titles: List[str], file_name: FilePath
+):
+    save_matrices(file_name, zip(matrices_titles, matrices))
+
+
 def generate_random_test_matrix() -> MatrixTask2:
-    data = np.random.randint(0, 10, TEST_MATRIX_SHAPE)
-    data_as_list = list(map(list, data))
-    return MatrixTask2(data_as_list)
+    return MatrixTask2(np.random.randint(0, 10, TEST_MATRIX_SHAPE))
 
 
 def run_tests():